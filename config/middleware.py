@@ -1,139 +1,255 @@
+import logging
+import re
 import time
-from collections import defaultdict
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
 
-# Simple in-memory storage for rate limiting
-rate_limit_data = defaultdict(list)
+from config.ratelimit import (
+    BulkWriteCost, FixedCost, PrefixRouter, RequestCost, SlidingWindowRateLimiter,
+    get_rate_limit_store)
+from contacts.views.contact import ContactFilter
 
+logger = logging.getLogger(__name__)
 
-class SimpleRateLimiter:
-    def __init__(self, max_requests, time_window):
-        self.max_requests = max_requests
-        self.time_window = time_window
 
-    def check_rate_limit(self, request):
-        # Get client IP (you might want to use other identifiers like user ID for authenticated users)
-        client_ip = self._get_client_ip(request)
-
-        # Get current timestamp
-        current_time = time.time()
-
-        # Clean up old records
-        self._clean_old_records(client_ip, current_time)
-
-        # Check if under limit
-        if len(rate_limit_data[client_ip]) < self.max_requests:
-            rate_limit_data[client_ip].append(current_time)
-            return True
-        return False
-
-    def _get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
-
-    def _clean_old_records(self, client_ip, current_time):
-        # Remove timestamps older than our time window
-        rate_limit_data[client_ip] = [
-            t for t in rate_limit_data[client_ip]
-            if current_time - t < self.time_window
-        ]
-
-    def get_remaining_requests(self, request):
-        """Get number of remaining requests for this client"""
-        client_ip = self._get_client_ip(request)
-        current_time = time.time()
-        self._clean_old_records(client_ip, current_time)
-        return max(0, self.max_requests - len(rate_limit_data[client_ip]))
-
-    def get_reset_time(self, request):
-        """Get when the rate limit resets for this client"""
-        client_ip = self._get_client_ip(request)
-        current_time = time.time()
-        self._clean_old_records(client_ip, current_time)
-
-        if rate_limit_data[client_ip]:
-            oldest_request = min(rate_limit_data[client_ip])
-            return int(oldest_request + self.time_window)
-        return int(current_time + self.time_window)
-
-
-class APIRateLimitMiddleware(MiddlewareMixin):
+class APIRateLimitMiddleware:
     """
     Rate limiting middleware specifically for API endpoints
+
+    Runs natively in both sync (WSGI) and async (ASGI) chains. The limiter
+    of a path comes from a compiled prefix router; the decision is kept on
+    ``request.rate_limit`` and the response headers are written from it.
+    Under ASGI the check runs on the event loop, so with the memory or
+    redis store a rejected request never waits for a thread. That holds as
+    long as the middleware after it in MIDDLEWARE is async-capable too;
+    otherwise Django runs this one in a thread as well.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
-        super().__init__(get_response)
-        # Different rate limits for different types of requests
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        store = get_rate_limit_store()
+        # Contact listings are charged by how expensive their query is
+        contact_cost = RequestCost(
+            ignored_params=ContactFilter.reserved_params,
+            **getattr(settings, 'RATE_LIMIT_COSTS', {}))
+        # Exports cost a flat price, bulk writes one by their row count
+        export_cost = FixedCost(getattr(settings, 'RATE_LIMIT_EXPORT_COST', 20))
+        bulk_cost = BulkWriteCost(**getattr(settings, 'RATE_LIMIT_BULK_COSTS', {}))
+        # One budget (same name, so same counters) for every contact route
+        contact_budget = {
+            'max_requests': 100, 'user_max_requests': 300, 'time_window': 300,
+            'name': '/api/v1/contacts/', 'store': store,
+        }
+        # Different rate limits for different types of requests; anonymous
+        # clients are counted by IP, JWT users by user id
         self.rate_limiters = {
             # Contact API endpoints
-            # 100 requests per 5 minutes
-            '/api/v1/contacts/': SimpleRateLimiter(max_requests=100, time_window=300),
+            # 100 units per 5 minutes (300 for users); a plain page costs 1
+            '/api/v1/contacts/': SlidingWindowRateLimiter(**contact_budget, cost=contact_cost),
+            '/api/v1/contacts/export/': SlidingWindowRateLimiter(**contact_budget, cost=export_cost),
+            '/api/v1/contacts/bulk/': SlidingWindowRateLimiter(**contact_budget, cost=bulk_cost),
 
             # General API rate limit (fallback)
-            # 200 requests per 5 minutes for other APIs
-            '/api/': SimpleRateLimiter(max_requests=200, time_window=300),
+            # 200 requests per 5 minutes for other APIs (600 for users)
+            '/api/': SlidingWindowRateLimiter(
+                max_requests=200, user_max_requests=600, time_window=300,
+                name='/api/', store=store),
 
             # Admin endpoints (more restrictive)
             # 50 requests per 5 minutes
-            '/admin/': SimpleRateLimiter(max_requests=50, time_window=300),
+            '/admin/': SlidingWindowRateLimiter(
+                max_requests=50, time_window=300, name='/admin/', store=store),
         }
+        self.router = PrefixRouter(self.rate_limiters)
 
-    def process_request(self, request):
-        """Check rate limits before processing the request"""
-        path = request.path
-
-        # Find the most specific rate limiter for this path
-        rate_limiter = None
-        matched_path = None
+    def get_rate_limiter(self, path):
+        """Limiter of the most specific prefix of ``path``, or None"""
+        return self.router.match(path)
 
-        for pattern, limiter in self.rate_limiters.items():
-            if path.startswith(pattern):
-                if matched_path is None or len(pattern) > len(matched_path):
-                    rate_limiter = limiter
-                    matched_path = pattern
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
 
+        rate_limiter = self.get_rate_limiter(request.path)
         # If no specific rate limiter found, skip rate limiting
         if rate_limiter is None:
-            return None
-
-        # Check if request is within rate limit
-        if not rate_limiter.check_rate_limit(request):
-            # Rate limit exceeded
-            return JsonResponse({
-                'error': 'Rate limit exceeded',
-                'message': f'Too many requests. Maximum {rate_limiter.max_requests} requests per {rate_limiter.time_window} seconds.',
-                'retry_after': rate_limiter.get_reset_time(request) - int(time.time()),
-                'remaining_requests': 0,
-                'limit': rate_limiter.max_requests,
-                'window_seconds': rate_limiter.time_window
-            }, status=429)
-
-        return None
-
-    def process_response(self, request, response):
+            return self.get_response(request)
+
+        decision = request.rate_limit = rate_limiter.hit(request)
+        if decision.allowed:
+            response = self.get_response(request)
+        else:
+            response = self.rejection(decision)
+        return self.add_headers(response, decision)
+
+    async def __acall__(self, request):
+        rate_limiter = self.get_rate_limiter(request.path)
+        if rate_limiter is None:
+            return await self.get_response(request)
+
+        decision = request.rate_limit = await rate_limiter.ahit(request)
+        if decision.allowed:
+            response = await self.get_response(request)
+        else:
+            response = self.rejection(decision)
+        return self.add_headers(response, decision)
+
+    def rejection(self, decision):
+        """429 response for a rejected request"""
+        response = JsonResponse({
+            'error': 'Rate limit exceeded',
+            'message': f'Too many requests. Maximum {decision.limit} units per {decision.window} seconds; '
+                       f'this request costs {decision.cost}.',
+            'retry_after': decision.retry_after,
+            'remaining_requests': 0,
+            'limit': decision.limit,
+            'window_seconds': decision.window
+        }, status=429)
+        response['Retry-After'] = str(decision.retry_after)
+        return response
+
+    def add_headers(self, response, decision):
         """Add rate limit headers to response"""
-        path = request.path
-
-        # Find the rate limiter used for this request
-        rate_limiter = None
-        for pattern, limiter in self.rate_limiters.items():
-            if path.startswith(pattern):
-                rate_limiter = limiter
-                break
-
-        if rate_limiter:
-            # Add rate limit headers
-            response['X-RateLimit-Limit'] = str(rate_limiter.max_requests)
-            response['X-RateLimit-Window'] = str(rate_limiter.time_window)
-            response['X-RateLimit-Remaining'] = str(
-                rate_limiter.get_remaining_requests(request))
-            response['X-RateLimit-Reset'] = str(
-                rate_limiter.get_reset_time(request))
+        response['X-RateLimit-Limit'] = str(decision.limit)
+        response['X-RateLimit-Window'] = str(decision.window)
+        response['X-RateLimit-Remaining'] = str(decision.remaining)
+        response['X-RateLimit-Cost'] = str(decision.cost)
+        response['X-RateLimit-Reset'] = str(decision.reset)
+        return response
+
+
+class RepeatedQueryError(Exception):
+    """A query fingerprint ran more often than allowed in one request"""
+
+
+# Placeholder lists of any length, e.g. "IN (%s, %s, %s)"
+PLACEHOLDER_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def query_fingerprint(sql):
+    """SQL with placeholder lists collapsed, so one query shape has one fingerprint"""
+    return WHITESPACE_RE.sub(' ', PLACEHOLDER_LIST_RE.sub('(%s...)', sql)).strip()
+
+
+class QueryStats:
+    """Execute wrapper counting, timing and fingerprinting the queries it sees"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[query_fingerprint(sql)] += 1
 
+    def repeated(self, max_repeats):
+        """``(fingerprint, count)`` of queries run more than ``max_repeats`` times"""
+        return [
+            (fingerprint, count)
+            for fingerprint, count in self.fingerprints.most_common()
+            if count > max_repeats
+        ]
+
+
+class QueryAccountingMiddleware:
+    """
+    Count and time the SQL queries of each request.
+
+    Keeps the stats on ``request.query_stats`` and, with
+    QUERY_ACCOUNTING_HEADERS set (by default under DEBUG), reports the number
+    of queries in ``X-DB-Queries`` and their total time in ``Server-Timing``
+    (``db;dur=<ms>``). A query fingerprint (the SQL with parameters
+    and IN lists collapsed) repeating more than QUERY_ACCOUNTING_MAX_REPEATS
+    times is the signature of an N+1: it is logged as an error, or raised as
+    RepeatedQueryError when QUERY_ACCOUNTING_STRICT is set (as in tests).
+
+    Queries run while a streaming response is iterated are not counted.
+
+    Runs in both sync and async chains. Connections are per thread, so under
+    ASGI the counters are installed from the request's sync thread, where
+    ``sync_to_async`` runs its views and ORM calls.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'QUERY_ACCOUNTING_ENABLED', True):
+            return self.get_response(request)
+
+        stats = QueryStats()
+        with self.count_queries(stats):
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'QUERY_ACCOUNTING_ENABLED', True):
+            return await self.get_response(request)
+
+        stats = QueryStats()
+        counting = await sync_to_async(self.count_queries)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(counting.close)()
+        return self.report(request, response, stats)
+
+    def count_queries(self, stats):
+        """Feed the queries of every connection of this thread to ``stats``"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        return stack
+
+    def report(self, request, response, stats):
+        request.query_stats = stats
+        if getattr(settings, 'QUERY_ACCOUNTING_HEADERS', False):
+            self.add_headers(response, stats)
+        self.check_repeats(request, stats)
         return response
+
+    def add_headers(self, response, stats):
+        timing = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+        if response.has_header('Server-Timing'):
+            timing = f'{response["Server-Timing"]}, {timing}'
+        response['Server-Timing'] = timing
+        response['X-DB-Queries'] = str(stats.count)
+
+    def check_repeats(self, request, stats):
+        max_repeats = getattr(settings, 'QUERY_ACCOUNTING_MAX_REPEATS', 10)
+        repeated = stats.repeated(max_repeats)
+        if not repeated:
+            return
+
+        top = '; '.join(f'{count}x {fingerprint}' for fingerprint, count in repeated[:3])
+        message = (
+            f'{request.method} {request.path} ran {stats.count} queries, '
+            f'repeating more than {max_repeats} times: {top}'
+        )
+        if getattr(settings, 'QUERY_ACCOUNTING_STRICT', False):
+            raise RepeatedQueryError(message)
+        logger.error(message)
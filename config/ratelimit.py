@@ -0,0 +1,652 @@
+"""
+Sliding window rate limiter and the stores holding its counters.
+
+A store keeps one counter per key and fixed window, and answers a single
+operation, ``hit(key, window, amount, ttl)``: atomically add ``amount`` to
+the key's count in ``window`` and return ``(count, previous window count)``.
+That is one round trip to the backend per request:
+
+* ``memory``: process memory (the default). Each worker process counts on
+  its own, so N workers allow N times the limit.
+* ``cache``: a Django cache alias. Atomic when the backend's ``incr`` is
+  (Memcached, Redis, local memory; not the database or file caches).
+* ``database``: one row per key in the ``RateLimitCounter`` table (created
+  by the contacts migrations), updated by a single
+  ``INSERT ... ON CONFLICT ... RETURNING`` (SQLite 3.35+, PostgreSQL).
+* ``redis``: any server speaking the Redis protocol, with one pipelined
+  ``MULTI``/``EXEC`` transaction per hit.
+
+``ahit`` is the same operation for async callers. The memory and redis
+stores answer it on the event loop; the cache and database stores run
+``hit`` in a thread.
+
+``RATE_LIMIT_STORE`` selects one of them (or a dotted path) and
+``RATE_LIMIT_STORE_OPTIONS`` holds the keyword arguments of its class.
+"""
+import asyncio
+import math
+import re
+import socket
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import unquote, urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from contacts.models import RateLimitCounter
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Outcome of one rate limit check, reused for the response headers"""
+    allowed: bool
+    limit: int
+    window: int
+    # Units this request was charged
+    cost: int
+    remaining: int
+    # Epoch second at which the current window ends
+    reset: int
+    # Seconds until a rejected client may try again (0 when allowed)
+    retry_after: int
+
+
+class RateLimitStore:
+    """Base class of the counter stores"""
+
+    def hit(self, key, window, amount, ttl):
+        """Add ``amount`` to ``key`` in ``window``; return ``(count, previous window count)``"""
+        raise NotImplementedError
+
+    async def ahit(self, key, window, amount, ttl):
+        """``hit`` for async callers; runs it in a thread unless the store overrides this"""
+        return await sync_to_async(self.hit)(key, window, amount, ttl)
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Per-client window counters in process memory, bounded in size.
+
+    Each key holds ``(window, count, previous count, expiry)`` in least
+    recently used order. Entries idle past their TTL are dropped from the
+    old end as new hits come in, and the least recently used one is evicted
+    once ``max_entries`` keys are held, so scanning traffic cannot grow it
+    without bound.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, amount, ttl):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            count = previous = 0
+            if entry is not None:
+                entry_window, entry_count, entry_previous, _ = entry
+                if entry_window == window:
+                    count, previous = entry_count, entry_previous
+                elif entry_window == window - 1:
+                    previous = entry_count
+
+            count += amount
+            self._entries[key] = (window, count, previous, now + ttl)
+            self._evict(now)
+        return count, previous
+
+    async def ahit(self, key, window, amount, ttl):
+        # Never blocks: no thread needed
+        return self.hit(key, window, amount, ttl)
+
+    def _evict(self, now):
+        entries = self._entries
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        while entries:
+            expires = entries[next(iter(entries))][3]
+            if expires > now:
+                break
+            entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Default store of the rate limiters of this process
+rate_limit_data = InMemoryRateLimitStore()
+
+
+class PreviousWindowCounts:
+    """Bounded LRU map of ``key -> (window, previous window count)``"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, window):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != window:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, window, count):
+        with self._lock:
+            self._entries[key] = (window, count)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CacheRateLimitStore(RateLimitStore):
+    """
+    Window counters in a Django cache, one key per client and window.
+
+    A hit is one ``incr`` (an ``add`` on the first hit of a window). The
+    previous window's count no longer changes, so it is read once per key
+    and window and then remembered in process memory.
+    """
+
+    def __init__(self, alias='default', key_prefix='ratelimit:', max_entries=10000):
+        self.alias = alias
+        self.key_prefix = key_prefix
+        # key -> (window, previous window count)
+        self._previous = PreviousWindowCounts(max_entries)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def hit(self, key, window, amount, ttl):
+        cache = self.cache
+        current_key = f'{self.key_prefix}{key}:{window}'
+        try:
+            count = cache.incr(current_key, amount)
+        except ValueError:
+            if cache.add(current_key, amount, timeout=ttl):
+                count = amount
+            else:
+                # Another process created it in between
+                count = cache.incr(current_key, amount)
+
+        previous = self._previous.get(key, window)
+        if previous is None:
+            previous = cache.get(f'{self.key_prefix}{key}:{window - 1}', 0)
+            self._previous.set(key, window, previous)
+        return count, previous
+
+
+class DatabaseRateLimitStore(RateLimitStore):
+    """
+    Window counters in the ``RateLimitCounter`` table, one row per key.
+
+    Each hit is a single upsert that rolls the row over to the new window
+    and returns both counts, so it is atomic without an explicit
+    transaction. Rows of idle keys are deleted every ``purge_interval``
+    seconds. Pointing ``using`` at a database of its own keeps these writes
+    out of the main database's lock; run ``migrate --database`` on it first.
+    """
+
+    def __init__(self, using='default', purge_interval=60):
+        self.using = using
+        self.purge_interval = purge_interval
+        self._purged_at = time.time()
+
+    def hit(self, key, window, amount, ttl):
+        now = time.time()
+        if now - self._purged_at >= self.purge_interval:
+            self._purged_at = now
+            RateLimitCounter.objects.using(self.using).filter(expires_at__lt=now).delete()
+
+        connection = connections[self.using]
+        table = connection.ops.quote_name(RateLimitCounter._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {table} (client_key, window_index, hits, previous_hits, expires_at)
+                VALUES (%s, %s, %s, 0, %s)
+                ON CONFLICT (client_key) DO UPDATE SET
+                    previous_hits = CASE
+                        WHEN {table}.window_index = excluded.window_index THEN {table}.previous_hits
+                        WHEN {table}.window_index = excluded.window_index - 1 THEN {table}.hits
+                        ELSE 0
+                    END,
+                    hits = CASE
+                        WHEN {table}.window_index = excluded.window_index
+                            THEN {table}.hits + excluded.hits
+                        ELSE excluded.hits
+                    END,
+                    window_index = excluded.window_index,
+                    expires_at = excluded.expires_at
+                RETURNING hits, previous_hits
+                ''',
+                [key, window, amount, now + ttl]
+            )
+            count, previous = cursor.fetchone()
+        return count, previous
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Window counters in a Redis-protocol server, one key per client and window.
+
+    A hit sends ``MULTI``, ``INCRBY``, ``EXPIRE``, ``GET`` (previous window)
+    and ``EXEC`` in one write and reads the replies, so it is one atomic
+    round trip. Speaks RESP over a plain socket, one connection per thread,
+    or over asyncio streams, one connection per event loop, so no client
+    library is needed and the async path never blocks a thread.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', key_prefix='ratelimit:', timeout=1.0):
+        self.url = url
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+        self._local = threading.local()
+        # event loop -> (reader, writer, lock)
+        self._async_connections = weakref.WeakKeyDictionary()
+
+    def hit(self, key, window, amount, ttl):
+        return self.hit_result(self.execute(*self.hit_commands(key, window, amount, ttl)))
+
+    async def ahit(self, key, window, amount, ttl):
+        return self.hit_result(await self.aexecute(*self.hit_commands(key, window, amount, ttl)))
+
+    def hit_commands(self, key, window, amount, ttl):
+        current_key = f'{self.key_prefix}{key}:{window}'
+        return (
+            ('MULTI',),
+            ('INCRBY', current_key, amount),
+            ('EXPIRE', current_key, math.ceil(ttl)),
+            ('GET', f'{self.key_prefix}{key}:{window - 1}'),
+            ('EXEC',),
+        )
+
+    def hit_result(self, replies):
+        for reply in replies[-1]:
+            if isinstance(reply, RedisError):
+                raise reply
+        count, _, previous = replies[-1]
+        return count, int(previous or 0)
+
+    def setup_commands(self):
+        """Commands selecting the database of ``url`` on a new connection"""
+        url = urlparse(self.url)
+        commands = []
+        if url.password:
+            commands.append(('AUTH', unquote(url.password)))
+        database = url.path.strip('/')
+        if database and database != '0':
+            commands.append(('SELECT', database))
+        return commands
+
+    def execute(self, *commands):
+        """Send ``commands`` in one write and return their replies"""
+        connection = self._connection()
+        try:
+            connection[0].sendall(b''.join(encode_command(*command) for command in commands))
+            replies = [read_reply(connection[1]) for _ in commands]
+        except OSError:
+            self.close()
+            raise
+        return check_replies(replies)
+
+    async def aexecute(self, *commands):
+        """``execute`` over the connection of the running event loop"""
+        loop = asyncio.get_running_loop()
+        connection = self._async_connections.get(loop)
+        if connection is None:
+            url = urlparse(self.url)
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                url.hostname or 'localhost', url.port or 6379), self.timeout)
+            connection = self._async_connections[loop] = (reader, writer, asyncio.Lock())
+            setup = self.setup_commands()
+            if setup:
+                await self.aexecute(*setup)
+
+        reader, writer, lock = connection
+        async with lock:
+            try:
+                writer.write(b''.join(encode_command(*command) for command in commands))
+                await writer.drain()
+                replies = [
+                    await asyncio.wait_for(aread_reply(reader), self.timeout)
+                    for _ in commands
+                ]
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                del self._async_connections[loop]
+                writer.close()
+                raise
+        return check_replies(replies)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            return connection
+
+        url = urlparse(self.url)
+        sock = socket.create_connection(
+            (url.hostname or 'localhost', url.port or 6379), timeout=self.timeout)
+        connection = self._local.connection = (sock, sock.makefile('rb'))
+        setup = self.setup_commands()
+        if setup:
+            self.execute(*setup)
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            connection[1].close()
+            connection[0].close()
+        for loop, (_, writer, _) in list(self._async_connections.items()):
+            if not loop.is_closed():
+                writer.close()
+        self._async_connections.clear()
+
+
+def check_replies(replies):
+    """Raise the first error reply"""
+    for reply in replies:
+        if isinstance(reply, RedisError):
+            raise reply
+    return replies
+
+
+def encode_command(*args):
+    """A command as a RESP array of bulk strings"""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        value = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(value), value))
+    return b''.join(parts)
+
+
+def read_reply(stream):
+    """Read one RESP reply; error replies are returned as RedisError"""
+    kind, body = parse_reply_line(stream.readline())
+    if kind == b'$':
+        length = int(body)
+        return None if length < 0 else stream.read(length + 2)[:-2].decode()
+    if kind == b'*':
+        length = int(body)
+        return None if length < 0 else [read_reply(stream) for _ in range(length)]
+    return body
+
+
+async def aread_reply(reader):
+    """``read_reply`` from an asyncio stream"""
+    kind, body = parse_reply_line(await reader.readline())
+    if kind == b'$':
+        length = int(body)
+        return None if length < 0 else (await reader.readexactly(length + 2))[:-2].decode()
+    if kind == b'*':
+        length = int(body)
+        return None if length < 0 else [await aread_reply(reader) for _ in range(length)]
+    return body
+
+
+def parse_reply_line(line):
+    """``(kind, value)`` of a reply line; bulk and array lines keep their length"""
+    if not line:
+        raise ConnectionError('Connection closed by the server')
+    kind, body = line[:1], line[1:-2]
+    if kind == b'+':
+        return kind, body.decode()
+    if kind == b'-':
+        return kind, RedisError(body.decode())
+    if kind == b':':
+        return kind, int(body)
+    if kind in (b'$', b'*'):
+        return kind, body
+    raise RedisError(f'Unexpected reply {line!r}')
+
+
+def get_jwt_user_id(request):
+    """
+    User id of a valid JWT access token in the Authorization header, or None.
+
+    Only the token's signature and expiry are checked, without a database
+    query; the view still authenticates the request.
+    """
+    header = request.META.get(jwt_settings.AUTH_HEADER_NAME, '').split()
+    if len(header) != 2 or header[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        return AccessToken(header[1]).get(jwt_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+class RequestCost:
+    """
+    Rate limit units charged for a listing request, from its query string.
+
+    A page of up to ``rows_per_unit`` rows costs ``base``; every further
+    ``rows_per_unit`` rows, each filter parameter and a ``search`` add to
+    it, up to ``max_cost``. Parameters in ``ignored_params`` are not
+    filters.
+    """
+
+    def __init__(self, base=1, rows_per_unit=20, per_filter=1, search=5, max_cost=20,
+                 page_size_param='page_size', search_param='search', ignored_params=()):
+        self.base = base
+        self.rows_per_unit = rows_per_unit
+        self.per_filter = per_filter
+        self.search = search
+        self.max_cost = max_cost
+        self.page_size_param = page_size_param
+        self.search_param = search_param
+        self.ignored_params = {page_size_param, search_param, *ignored_params}
+
+    def __call__(self, request):
+        params = request.GET
+        cost = self.base
+
+        try:
+            page_size = int(params.get(self.page_size_param, 0))
+        except ValueError:
+            page_size = 0
+        if page_size > self.rows_per_unit:
+            cost += math.ceil(page_size / self.rows_per_unit) - 1
+
+        cost += self.per_filter * sum(
+            1 for param, value in params.items()
+            if param not in self.ignored_params and value and value.lower() != 'null'
+        )
+        if params.get(self.search_param, '').strip():
+            cost += self.search
+        return min(cost, self.max_cost)
+
+
+class FixedCost:
+    """The same number of rate limit units for every request"""
+
+    def __init__(self, units):
+        self.units = units
+
+    def __call__(self, request):
+        return self.units
+
+
+class BulkWriteCost:
+    """
+    Rate limit units charged for a bulk write, by its number of rows.
+
+    The rows are estimated from ``Content-Length`` at ``bytes_per_row``, so
+    the request is charged before its body is read: ``base`` plus one unit
+    per ``rows_per_unit`` rows, up to ``max_cost``.
+    """
+
+    def __init__(self, base=10, rows_per_unit=100, bytes_per_row=200, max_cost=100):
+        self.base = base
+        self.rows_per_unit = rows_per_unit
+        self.bytes_per_row = bytes_per_row
+        self.max_cost = max_cost
+
+    def __call__(self, request):
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        rows = length / self.bytes_per_row
+        return min(self.base + math.ceil(rows / self.rows_per_unit), self.max_cost)
+
+
+class SlidingWindowRateLimiter:
+    """
+    Sliding window counter: ``max_requests`` units per ``time_window`` seconds.
+
+    Time is cut into fixed windows and each client only keeps the count of
+    the current and previous one. The units spent in the last
+    ``time_window`` seconds are estimated as the current count plus the
+    previous count weighted by how much of the previous window still
+    overlaps, which is constant work and memory per client. Rejected
+    requests are counted too, so a client that keeps retrying above the
+    limit stays limited.
+
+    Clients with a valid JWT are counted by user id against
+    ``user_max_requests`` (``max_requests`` by default), others by IP. A
+    request costs one unit, or what ``cost(request)`` returns.
+    """
+
+    def __init__(self, max_requests, time_window, name='', store=None,
+                 user_max_requests=None, cost=None):
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.name = name
+        self.store = store if store is not None else rate_limit_data
+        self.user_max_requests = user_max_requests or max_requests
+        self.cost = cost
+
+    def hit(self, request, now=None):
+        """Charge ``request`` to its client and decide whether it may proceed"""
+        key, cost, max_requests = self.charge(request)
+        return self.hit_key(key, cost, now=now, max_requests=max_requests)
+
+    async def ahit(self, request, now=None):
+        """``hit`` awaiting the store"""
+        key, cost, max_requests = self.charge(request)
+        now = time.time() if now is None else now
+        window = int(now // self.time_window)
+        count, previous = await self.store.ahit(
+            f'{self.name}:{key}', window, cost, ttl=2 * self.time_window)
+        return self.decide(now, window, count, previous, cost, max_requests)
+
+    def charge(self, request):
+        """``(client key, cost, max_requests)`` of ``request``"""
+        cost = self.cost(request) if self.cost else 1
+        user_id = get_jwt_user_id(request)
+        if user_id is not None:
+            return f'user:{user_id}', cost, self.user_max_requests
+        return f'ip:{self._get_client_ip(request)}', cost, self.max_requests
+
+    def hit_key(self, key, cost=1, now=None, max_requests=None):
+        now = time.time() if now is None else now
+        window = int(now // self.time_window)
+        count, previous = self.store.hit(
+            f'{self.name}:{key}', window, cost, ttl=2 * self.time_window)
+        return self.decide(now, window, count, previous, cost, max_requests or self.max_requests)
+
+    def decide(self, now, window, count, previous, cost, max_requests):
+        """Decision from the counts of the current and previous window"""
+        offset = now - window * self.time_window
+        used = previous * (1 - offset / self.time_window) + count
+        allowed = used <= max_requests
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=max_requests,
+            window=self.time_window,
+            cost=cost,
+            remaining=max(0, int(max_requests - used)),
+            reset=(window + 1) * self.time_window,
+            retry_after=0 if allowed else self._retry_after(
+                now, window, count, previous, max_requests - cost),
+        )
+
+    def _retry_after(self, now, window, count, previous, room):
+        """Seconds until the estimate leaves ``room`` units spent"""
+        if count <= room:
+            # The previous window's share has to decay enough
+            start = window * self.time_window
+            elapsed = self.time_window * (1 - (room - count) / previous)
+        else:
+            # Only once this window has become the previous one
+            start = (window + 1) * self.time_window
+            elapsed = self.time_window * (1 - max(room, 0) / count)
+        return max(1, math.ceil(start + elapsed - now))
+
+    def _get_client_ip(self, request):
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            ip = x_forwarded_for.split(',')[0]
+        else:
+            ip = request.META.get('REMOTE_ADDR')
+        return ip
+
+
+class PrefixRouter:
+    """
+    Longest-prefix lookup of a path in one compiled regex.
+
+    The prefixes are alternated longest first, so the first alternative
+    matching is the most specific one.
+    """
+
+    def __init__(self, routes):
+        prefixes = sorted(routes, key=len, reverse=True)
+        self._values = [routes[prefix] for prefix in prefixes]
+        self._pattern = re.compile('|'.join(f'({re.escape(prefix)})' for prefix in prefixes))
+
+    def match(self, path):
+        """Value of the longest prefix of ``path``, or None"""
+        if not self._values:
+            return None
+        match = self._pattern.match(path)
+        return None if match is None else self._values[match.lastindex - 1]
+
+
+STORES = {
+    'memory': InMemoryRateLimitStore,
+    'cache': CacheRateLimitStore,
+    'database': DatabaseRateLimitStore,
+    'redis': RedisRateLimitStore,
+}
+
+
+def get_rate_limit_store():
+    """
+    Store for the rate limiters, from the ``RATE_LIMIT_STORE`` setting.
+
+    ``RATE_LIMIT_STORE`` may name one of ``STORES`` or give a dotted path;
+    ``RATE_LIMIT_STORE_OPTIONS`` are passed to it. The default in-memory
+    store is the process-wide ``rate_limit_data``.
+    """
+    name = getattr(settings, 'RATE_LIMIT_STORE', None) or 'memory'
+    options = getattr(settings, 'RATE_LIMIT_STORE_OPTIONS', None) or {}
+    if name == 'memory' and not options:
+        return rate_limit_data
+    if name in STORES:
+        return STORES[name](**options)
+    return import_string(name)(**options)
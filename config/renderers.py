@@ -0,0 +1,50 @@
+"""
+Drop-in replacement for DRF's JSONRenderer backed by orjson.
+
+orjson encodes dicts, lists, UUIDs and datetimes natively in C. The output
+follows DRF's JSONRenderer: compact separators, raw UTF-8, ``Z`` for UTC
+datetimes and escaped U+2028/U+2029. Anything orjson cannot encode goes
+through DRF's JSON encoder. The stdlib renderer takes over for indented
+output, non-default JSON settings, data orjson rejects (integers over 64
+bits, non-string dict keys), and everything when orjson is not installed.
+One difference remains: NaN and infinity encode as ``null`` instead of
+raising.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dataclasses go through the DRF encoder, as with the stdlib renderer
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using orjson when available"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.can_use_orjson(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, for JavaScript embedding
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def can_use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and not self.get_indent(accepted_media_type, renderer_context)
+            and not self.ensure_ascii
+            and self.compact
+            and self.strict
+            and self.encoder_class is JSONEncoder
+        )
@@ -14,6 +14,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,10 +53,13 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    # Rate limiting for API endpoints; first, so rejections skip the rest
+    # (sync and async capable, no thread hop under ASGI)
+    'config.middleware.APIRateLimitMiddleware',
+    'config.middleware.QueryAccountingMiddleware',  # X-DB-Queries, Server-Timing, N+1 detection
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'config.middleware.APIRateLimitMiddleware',  # Rate limiting for API endpoints
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -73,12 +78,77 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
 
+# Contacts list
+# How paginated contact listings compute `count`: 'exact', 'estimated'
+# (planner statistics on PostgreSQL), 'cached' (exact, cached per filter
+# signature for CONTACTS_COUNT_CACHE_TIMEOUT seconds) or 'none'.
+CONTACTS_COUNT_STRATEGY = os.environ.get('CONTACTS_COUNT_STRATEGY', 'exact')
+CONTACTS_COUNT_CACHE_TIMEOUT = 60
+# Seconds to cache contact list responses per normalized query string;
+# any write to contact data expires them. 0 disables the cache.
+CONTACTS_RESPONSE_CACHE_TIMEOUT = 30
+# Seconds to cache facet counts per filter signature; expired by writes
+# like list responses. 0 disables the cache.
+CONTACTS_FACET_CACHE_TIMEOUT = 300
+# Serve the contacts list from the denormalized FlatContact table
+# (rebuild it with `python manage.py rebuild_flat_contacts`)
+CONTACTS_USE_READ_MODEL = os.environ.get('CONTACTS_USE_READ_MODEL', '') == '1'
+# Backend for the `search` parameter: 'substring', 'trigram' (PostgreSQL
+# pg_trgm indexes), 'fts' (SQLite FTS5) or a dotted path. None picks one
+# from the database vendor.
+CONTACTS_SEARCH_BACKEND = None
+
+# Where rate limit counters live (config.ratelimit): 'memory' (per
+# process), 'cache', 'database', 'redis' or a dotted path, with the keyword
+# arguments of the store class in RATE_LIMIT_STORE_OPTIONS, e.g.
+# {'url': 'redis://localhost:6379/0'}. Share one across worker processes so
+# the limits hold whatever the number of workers.
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+RATE_LIMIT_STORE_OPTIONS = {}
+
+# Rate limit units charged per contacts request (config.ratelimit.RequestCost):
+# 'base' for a page of up to 'rows_per_unit' rows, +1 per further
+# 'rows_per_unit' rows, 'per_filter' per property filter and 'search' for a
+# search, capped at 'max_cost'.
+RATE_LIMIT_COSTS = {
+    'base': 1,
+    'rows_per_unit': 20,
+    'per_filter': 1,
+    'search': 5,
+    'max_cost': 20,
+}
+# Exports cost a flat RATE_LIMIT_EXPORT_COST units. Bulk writes
+# (config.ratelimit.BulkWriteCost) cost 'base' plus 1 per 'rows_per_unit'
+# rows, counting 'bytes_per_row' bytes of body per row, capped at 'max_cost'.
+RATE_LIMIT_EXPORT_COST = 20
+RATE_LIMIT_BULK_COSTS = {
+    'base': 10,
+    'rows_per_unit': 100,
+    'bytes_per_row': 200,
+    'max_cost': 100,
+}
+
+# Per-request SQL accounting (config.middleware.QueryAccountingMiddleware).
+# A query repeated more than QUERY_ACCOUNTING_MAX_REPEATS times in one request
+# is logged as an error, or raises RepeatedQueryError in strict mode. The
+# X-DB-Queries and Server-Timing headers expose this to clients, so they are
+# only sent when QUERY_ACCOUNTING_HEADERS is set.
+QUERY_ACCOUNTING_ENABLED = True
+QUERY_ACCOUNTING_HEADERS = DEBUG
+QUERY_ACCOUNTING_MAX_REPEATS = 10
+QUERY_ACCOUNTING_STRICT = False
+
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -192,7 +262,12 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
             'OPTIONS': {
                 'timeout': 60,
-            }
+            },
+            # A file rather than memory, so worker processes forked by
+            # tests see the same test database
+            'TEST': {
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
         }
     }
 
@@ -212,6 +287,38 @@ else:
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/ref/settings/#caches
+
+# Must be shared by every process serving or writing contacts: the version
+# stamps that expire cached responses, counts, facets, ETags and property
+# metadata live here (see contacts.cache). Redis when REDIS_URL is set,
+# files under CACHE_LOCATION otherwise. The file cache lists every entry to
+# cull on each set, so it only serves development and tests.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif not DEBUG:
+    raise ImproperlyConfigured('Set REDIS_URL to run with DEBUG off.')
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / '.cache'),
+            'OPTIONS': {
+                'MAX_ENTRIES': 20000,
+            }
+        }
+    }
+
+# Tests keep their cache files in a temporary directory (config.test_runner)
+TEST_RUNNER = 'config.test_runner.TestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -248,6 +355,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Covering indexes (Index.include) are PostgreSQL-only; SQLite builds them
+# without the INCLUDE columns, which is what we want for local runs.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -0,0 +1,41 @@
+"""
+Test runner keeping the file cache out of the working tree.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Run tests against a fresh CACHE_LOCATION, removed afterwards.
+
+    The location is also exported in the environment, so processes started
+    by the tests (see contacts.tests.run_in_other_process) share it.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_location = tempfile.mkdtemp(prefix='hrm-test-cache-')
+        self.previous_cache_location = os.environ.get('CACHE_LOCATION')
+        os.environ['CACHE_LOCATION'] = self.cache_location
+        caches = {
+            alias: {**config, 'LOCATION': self.cache_location}
+            if config['BACKEND'].endswith('FileBasedCache') else config
+            for alias, config in settings.CACHES.items()
+        }
+        self.cache_override = override_settings(CACHES=caches)
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        if self.previous_cache_location is None:
+            del os.environ['CACHE_LOCATION']
+        else:
+            os.environ['CACHE_LOCATION'] = self.previous_cache_location
+        shutil.rmtree(self.cache_location, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,264 @@
+"""
+Bulk upsert of contacts and their property values.
+
+Input rows are objects keyed by property slug, in the shape the contact API
+and export return them. Slugs and option codes are resolved against the
+in-memory property registry, so validation runs no query. Valid rows are
+written in chunks, one transaction and one upsert per table each.
+``update_contact`` applies the same rows to a single contact.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from contacts.cache import bump_data_version
+from contacts.models import Contact, ContactProperty
+from contacts.read_model import refresh_flat_contacts
+from contacts.registry import property_registry
+
+UPSERT_CHUNK_SIZE = 1000
+
+# Keys of exported rows that are not property values
+READ_ONLY_KEYS = ('created_at', 'updated_at')
+
+STATUS_CREATED = 'created'
+STATUS_UPDATED = 'updated'
+STATUS_ERROR = 'error'
+
+VALUE_FIELDS = ['singleline_value', 'richtext_value', 'singleoption_value']
+VALUE_ATTNAMES = {
+    name: ContactProperty._meta.get_field(name).attname for name in VALUE_FIELDS}
+SINGLELINE_MAX_LENGTH = ContactProperty._meta.get_field('singleline_value').max_length
+
+
+def clean_value(property_meta, value):
+    """
+    Model field values for one property value.
+
+    Options are given by code, or as the ``{'code', 'value', 'id'}`` object
+    the API returns. ``None`` (a ``null`` value, which clears the property)
+    gives None. Raises ValueError with a message for invalid values.
+    """
+    if value is None:
+        return None
+
+    values = dict.fromkeys(VALUE_FIELDS)
+
+    if property_meta.type in ('singleline', 'textarea'):
+        if not isinstance(value, str):
+            raise ValueError('Expected a string.')
+        if property_meta.type == 'singleline':
+            if len(value) > SINGLELINE_MAX_LENGTH:
+                raise ValueError(
+                    f'Ensure this value has at most {SINGLELINE_MAX_LENGTH} characters.')
+            values['singleline_value'] = value
+        else:
+            values['richtext_value'] = value
+
+    elif property_meta.type == 'option':
+        code = value.get('code') if isinstance(value, dict) else value
+        if not isinstance(code, str):
+            raise ValueError('Expected an option code.')
+        option_meta = property_meta.get_option(code)
+        if option_meta is None:
+            raise ValueError(f'Unknown option code "{code}".')
+        values['singleoption_value'] = option_meta.id
+
+    return values
+
+
+def validate_row(row):
+    """
+    Validate one input row.
+
+    Returns ``(contact_id, values, errors)`` where ``contact_id`` is None for
+    a new contact and ``values`` maps property ids to model field values, or
+    to None for a property to clear.
+    """
+    if not isinstance(row, dict):
+        return None, {}, {'non_field_errors': ['Expected an object.']}
+
+    errors = {}
+    contact_id = row.get('id')
+    if contact_id is not None:
+        try:
+            contact_id = uuid.UUID(str(contact_id))
+        except ValueError:
+            errors['id'] = ['Must be a valid UUID.']
+            contact_id = None
+
+    values = {}
+    for slug, value in row.items():
+        if slug == 'id' or slug in READ_ONLY_KEYS:
+            continue
+        property_meta = property_registry.get(slug)
+        if property_meta is None:
+            errors[slug] = ['Unknown property.']
+            continue
+        try:
+            values[property_meta.id] = clean_value(property_meta, value)
+        except ValueError as exc:
+            errors[slug] = [str(exc)]
+
+    return contact_id, values, errors
+
+
+def upsert_contacts(rows, user=None, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Create or update contacts from ``rows`` and return one result per row.
+
+    Rows with an ``id`` update that contact (creating it if missing), other
+    rows create a contact. Only the properties present in a row are written.
+    Invalid rows are reported and skipped; the others are written.
+    """
+    results = [None] * len(rows)
+    pending = []
+    seen_ids = set()
+
+    for index, row in enumerate(rows):
+        contact_id, values, errors = validate_row(row)
+        if contact_id in seen_ids:
+            errors['id'] = ['Duplicate contact id in this request.']
+        if errors:
+            result = {'index': index, 'status': STATUS_ERROR, 'errors': errors}
+            if contact_id is not None:
+                result['id'] = str(contact_id)
+            results[index] = result
+            continue
+
+        if contact_id is None:
+            contact_id = uuid.uuid4()
+        seen_ids.add(contact_id)
+        pending.append((index, contact_id, values))
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        existing = write_chunk(chunk, user)
+        for index, contact_id, _ in chunk:
+            results[index] = {
+                'index': index,
+                'id': str(contact_id),
+                'status': STATUS_UPDATED if contact_id in existing else STATUS_CREATED,
+            }
+
+    return results
+
+
+def write_chunk(chunk, user=None):
+    """Upsert one chunk of validated rows; returns the ids that already existed"""
+    contact_ids = [contact_id for _, contact_id, _ in chunk]
+
+    with transaction.atomic():
+        existing = set(
+            Contact.objects.filter(pk__in=contact_ids).values_list('pk', flat=True))
+
+        Contact.objects.bulk_create(
+            [
+                Contact(id=contact_id, created_by=user, changed_by=user)
+                for contact_id in contact_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=['changed_by', 'updated_at']
+        )
+
+        contact_properties = []
+        cleared = Q()
+        for _, contact_id, values in chunk:
+            for property_id, fields in values.items():
+                if fields is None:
+                    cleared |= Q(contact_id=contact_id, property_id=property_id)
+                    continue
+                contact_properties.append(ContactProperty(
+                    contact_id=contact_id,
+                    property_id=property_id,
+                    singleline_value=fields['singleline_value'],
+                    richtext_value=fields['richtext_value'],
+                    singleoption_value_id=fields['singleoption_value'],
+                    created_by=user,
+                    changed_by=user
+                ))
+        if cleared:
+            ContactProperty.objects.filter(cleared).delete()
+        ContactProperty.objects.bulk_create(
+            contact_properties,
+            update_conflicts=True,
+            unique_fields=['property', 'contact'],
+            update_fields=VALUE_FIELDS + ['changed_by', 'updated_at']
+        )
+
+        # bulk_create sends no signals; sync the read model and expire
+        # cached responses here
+        refresh_flat_contacts(contact_ids)
+        transaction.on_commit(bump_data_version)
+
+    return existing
+
+
+def update_contact(contact, values, user=None):
+    """
+    Write the changed property values of one contact.
+
+    ``values`` maps property ids to model field values, as returned by
+    ``validate_row``. Rows whose values differ are updated with one
+    ``bulk_update``, missing rows are inserted with one ``bulk_create``,
+    cleared rows are deleted, and unchanged rows are not written. Returns
+    the number of rows written.
+    """
+    with transaction.atomic():
+        existing = {
+            contact_property.property_id: contact_property
+            for contact_property in ContactProperty.objects.filter(
+                contact=contact, property_id__in=list(values))
+        }
+        now = timezone.now()
+        changed = []
+        created = []
+        deleted = []
+        for property_id, fields in values.items():
+            contact_property = existing.get(property_id)
+            if fields is None:
+                if contact_property is not None:
+                    deleted.append(contact_property.pk)
+                continue
+            if contact_property is None:
+                created.append(ContactProperty(
+                    contact=contact,
+                    property_id=property_id,
+                    singleline_value=fields['singleline_value'],
+                    richtext_value=fields['richtext_value'],
+                    singleoption_value_id=fields['singleoption_value'],
+                    created_by=user,
+                    changed_by=user
+                ))
+                continue
+
+            if all(getattr(contact_property, VALUE_ATTNAMES[name]) == fields[name]
+                   for name in VALUE_FIELDS):
+                continue
+            for name in VALUE_FIELDS:
+                setattr(contact_property, VALUE_ATTNAMES[name], fields[name])
+            contact_property.changed_by = user
+            # bulk_update() does not apply auto_now
+            contact_property.updated_at = now
+            changed.append(contact_property)
+
+        if not changed and not created and not deleted:
+            return 0
+
+        if changed:
+            ContactProperty.objects.bulk_update(
+                changed, VALUE_FIELDS + ['changed_by', 'updated_at'])
+        if created:
+            ContactProperty.objects.bulk_create(created)
+        if deleted:
+            ContactProperty.objects.filter(pk__in=deleted).delete()
+        Contact.objects.filter(pk=contact.pk).update(changed_by=user, updated_at=now)
+
+        # Neither bulk call sends signals
+        refresh_flat_contacts([contact.pk])
+        transaction.on_commit(bump_data_version)
+
+    return len(changed) + len(created) + len(deleted)
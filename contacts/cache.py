@@ -0,0 +1,108 @@
+"""
+Version stamps, response caching and conditional GET for the contact API.
+
+Cached entries embed the current data version in their key instead of being
+deleted one by one: any write to Contact, ContactProperty, Property or Option
+bumps the version (see ``contacts.signals``) and every older entry simply
+stops being read until it expires. The same version, and the time it last
+changed, are the ETag and Last-Modified of contact listings.
+
+Versions are random tokens kept in the default cache, which must be shared
+by every process that serves or writes contacts (web workers, management
+commands); with a per-process cache, writes made elsewhere go unseen.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from contacts.utils import query_signature
+
+DATA_VERSION = 'data_version'
+DATA_MODIFIED = 'data_modified'
+
+# Present, even empty, it switches a listing to keyset pagination
+# (ContactListMixin.paginator)
+CURSOR_PARAM = 'cursor'
+
+
+def version_key(name):
+    """
+    Cache key of a version stamp of the contact data in the default database.
+
+    The database name is part of the key, so a test database never shares
+    stamps, and through them cached responses, with the development one.
+    """
+    database = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+    return f'contacts:{name}:{database}'
+
+
+def bump_version(name):
+    """Give a version stamp a new value, never used before"""
+    cache.set(version_key(name), uuid.uuid4().hex, timeout=None)
+
+
+def get_version(name):
+    """Current value of a version stamp"""
+    key = version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Never set, or evicted: start from a fresh value
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_data_version():
+    """Current version of the contact data"""
+    return get_version(DATA_VERSION)
+
+
+def get_data_modified():
+    """When the contact data last changed, as far as the cache knows"""
+    key = version_key(DATA_MODIFIED)
+    modified = cache.get(key)
+    if modified is None:
+        # Unknown, e.g. after a cache flush: assume it changed just now
+        modified = timezone.now()
+        if not cache.add(key, modified, timeout=None):
+            modified = cache.get(key, modified)
+    return modified
+
+
+def bump_data_version():
+    """Mark every cached response and count as stale"""
+    bump_version(DATA_VERSION)
+    cache.set(version_key(DATA_MODIFIED), timezone.now(), timeout=None)
+
+
+def listing_signature(request):
+    """
+    Hash of what a contact listing response depends on besides the data.
+
+    The normalized query (sorted, empty and ``null`` values dropped, so
+    equivalent query strings match), the pagination mode, which an empty
+    ``cursor`` selects, and the scheme and host of the absolute
+    ``next``/``previous`` links.
+    """
+    mode = 'cursor' if CURSOR_PARAM in request.GET else 'page'
+    origin = request.build_absolute_uri('/')
+    signature = f'{origin}|{mode}|{query_signature(request.GET)}'
+    return hashlib.sha1(signature.encode('utf-8')).hexdigest()
+
+
+def response_cache_key(request, prefix='contacts:response'):
+    """Cache key of a GET request for the current data version"""
+    return f'{prefix}:{get_data_version()}:{request.path}:{listing_signature(request)}'
+
+
+def contact_list_etag(request, *args, **kwargs):
+    """Weak ETag of a contact listing: data version and listing signature"""
+    return f'W/"{get_data_version()}-{listing_signature(request)}"'
+
+
+def contact_list_last_modified(request, *args, **kwargs):
+    return get_data_modified()
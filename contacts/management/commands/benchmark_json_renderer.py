@@ -0,0 +1,82 @@
+import timeit
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare the encoding speed of JSONRenderer and FastJSONRenderer on a contact page'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--contacts',
+            type=int,
+            default=100,
+            help='Contacts per page (default: 100)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Renders per renderer (default: 200)'
+        )
+
+    def handle(self, *args, **options):
+        data = self._build_page(options['contacts'])
+        iterations = options['iterations']
+
+        baseline = JSONRenderer().render(data)
+        fast = FastJSONRenderer().render(data)
+        if baseline != fast:
+            self.stdout.write(self.style.WARNING('Renderers produced different output'))
+
+        self.stdout.write(
+            f'Rendering a page of {options["contacts"]:,} contacts '
+            f'({len(baseline):,} bytes), {iterations:,} times each'
+        )
+        timings = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            seconds = min(timeit.repeat(
+                lambda: renderer.render(data), number=iterations, repeat=3))
+            timings[renderer.__class__.__name__] = seconds / iterations
+            self.stdout.write(
+                f'{renderer.__class__.__name__:>18}: {seconds / iterations * 1000:.3f} ms/page')
+
+        speedup = timings['JSONRenderer'] / timings['FastJSONRenderer']
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {speedup:.1f}x'))
+
+    def _build_page(self, count):
+        """A paginated response shaped like the contact list, with native values"""
+        now = timezone.now()
+
+        def option(code, value):
+            return {'code': code, 'value': value, 'id': uuid.uuid4()}
+
+        results = [
+            {
+                'id': uuid.uuid4(),
+                'created_at': now,
+                'updated_at': now,
+                'first_name': f'First {index}',
+                'last_name': f'Last {index}',
+                'email': f'contact{index}@company.com',
+                'phone_number': f'+1-555-{index:04d}',
+                'location': 'Hồ Chí Minh',
+                'notes': 'Senior developer with 5 years experience',
+                'department': option('it', 'IT Department'),
+                'status': option('active', 'Active'),
+                'position': option('developer', 'Developer'),
+            }
+            for index in range(count)
+        ]
+        return {
+            'count': count,
+            'count_strategy': 'exact',
+            'next': None,
+            'previous': None,
+            'results': results,
+        }
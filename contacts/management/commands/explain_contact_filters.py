@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import QueryDict
+
+from contacts.models import Contact, ContactProperty
+from contacts.pagination import ContactPagination
+from contacts.registry import property_registry
+from contacts.views.contact import ContactFilter
+
+
+class Command(BaseCommand):
+    help = 'Print the query plans of contact list filters (run before and after migrating to compare)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries',
+            nargs='*',
+            help='Query strings to explain, e.g. "department=it&status=active" '
+                 '(default: one sample per option property plus an email lookup)'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Execute the queries and report actual timings (PostgreSQL only)'
+        )
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or self._default_queries()
+        if not queries:
+            self.stdout.write(self.style.ERROR(
+                'No properties found. Please run "python manage.py initproperty" first.'))
+            return
+
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options['analyze'] = True
+
+        for query_string in queries:
+            queryset = self._filtered_queryset(QueryDict(query_string))
+            page = queryset[:ContactPagination.page_size]
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'?{query_string}'))
+            self.stdout.write(self.style.MIGRATE_LABEL('  count:'))
+            self.stdout.write(self._indent(
+                queryset.order_by().values('pk').explain(**explain_options)))
+            self.stdout.write(self.style.MIGRATE_LABEL('  first page:'))
+            self.stdout.write(self._indent(page.explain(**explain_options)))
+            self.stdout.write('')
+
+    def _filtered_queryset(self, params):
+        request = SimpleNamespace(GET=params)
+        filterset = ContactFilter(
+            params, queryset=Contact.objects.all(), request=request)
+        return filterset.qs
+
+    def _default_queries(self):
+        queries = []
+        for property_meta in property_registry.all():
+            if property_meta.type == 'option' and property_meta.options:
+                queries.append(f'{property_meta.slug}={property_meta.options[0].code}')
+
+        if len(queries) > 1:
+            queries.append('&'.join(queries[:2]))
+
+        email = property_registry.get('email')
+        if email is not None:
+            sample = ContactProperty.objects.filter(
+                property_id=email.id, singleline_value__isnull=False
+            ).values_list('singleline_value', flat=True).first()
+            if sample:
+                queries.append(QueryDict.fromkeys(['email'], sample).urlencode())
+        return queries
+
+    def _indent(self, text):
+        return '\n'.join(f'    {line}' for line in text.splitlines())
@@ -1,14 +1,23 @@
+import multiprocessing
 import random
 import string
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
 from django.contrib.auth import get_user_model
-from contacts.models import Contact, Property, Option, ContactProperty
+from contacts.cache import bump_data_version
+from contacts.models import Contact, Property, ContactProperty, FlatContact
+from contacts.read_model import refresh_flat_contacts
 from faker import Faker
 
 User = get_user_model()
 fake = Faker()
 
+# Batches per unit of work handed to a worker process
+SHARD_BATCHES = 10
+
 
 class Command(BaseCommand):
     help = 'Generate millions of fake contacts with properties'
@@ -30,16 +39,24 @@ class Command(BaseCommand):
             action='store_true',
             help='Delete all existing contacts before creating new ones'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes generating contacts in parallel, each with '
+                 'its own database connection (default: 1)'
+        )
 
     def handle(self, *args, **options):
         count = options['count']
         batch_size = options['batch_size']
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
 
         if options['reset']:
             self.stdout.write(self.style.WARNING(
                 'Deleting existing contacts...'))
-            ContactProperty.objects.all().delete()
-            Contact.objects.all().delete()
+            self._delete_existing_contacts()
 
         # Get or create a user for audit fields
         user, _ = User.objects.get_or_create(
@@ -52,7 +69,7 @@ class Command(BaseCommand):
         )
 
         # Get all properties and their options
-        properties = list(Property.objects.all())
+        properties, property_options = load_properties()
         if not properties:
             self.stdout.write(
                 self.style.ERROR(
@@ -61,16 +78,15 @@ class Command(BaseCommand):
             )
             return
 
-        # Cache options for option-type properties
-        property_options = {}
-        for prop in properties:
-            if prop.type == 'option':
-                property_options[prop.id] = list(prop.options.all())
-
         self.stdout.write(f'Starting to create {count:,} fake contacts...')
 
+        if options['workers'] > 1:
+            self._create_in_parallel(count, batch_size, options['workers'], user)
+            return
+
         created_contacts = 0
         created_properties = 0
+        started = time.monotonic()
 
         # Process in batches
         for batch_start in range(0, count, batch_size):
@@ -78,58 +94,15 @@ class Command(BaseCommand):
             current_batch_size = batch_end - batch_start
 
             try:
-                with transaction.atomic():
-                    # Create contacts in bulk
-                    contacts_to_create = []
-                    for i in range(current_batch_size):
-                        contact = Contact(
-                            created_by=user,
-                            changed_by=user
-                        )
-                        contacts_to_create.append(contact)
-
-                    # Bulk create contacts
-                    contacts = Contact.objects.bulk_create(contacts_to_create)
-                    created_contacts += len(contacts)
-
-                    # Create contact properties in smaller chunks
-                    contact_properties_to_create = []
-
-                    for contact in contacts:
-                        # Create properties for each contact
-                        for prop in properties:
-                            contact_prop = ContactProperty(
-                                contact=contact,
-                                property=prop,
-                                created_by=user,
-                                changed_by=user
-                            )
-
-                            # Generate fake data based on property type and slug
-                            if prop.type == 'singleline':
-                                contact_prop.singleline_value = self._generate_singleline_value(
-                                    prop.slug)
-                            elif prop.type == 'textarea':
-                                contact_prop.richtext_value = fake.text(
-                                    max_nb_chars=500)
-                            elif prop.type == 'option' and prop.id in property_options:
-                                options = property_options[prop.id]
-                                if options:
-                                    contact_prop.singleoption_value = random.choice(
-                                        options)
-
-                            contact_properties_to_create.append(contact_prop)
-
-                    # Bulk create contact properties
-                    ContactProperty.objects.bulk_create(
-                        contact_properties_to_create, batch_size=500)
-                    created_properties += len(contact_properties_to_create)
-                    
+                contacts, contact_properties = create_batch(
+                    current_batch_size, user, properties, property_options)
             except Exception as e:
                 self.stdout.write(
                     self.style.ERROR(f'Error in batch {batch_start//batch_size + 1}: {e}')
                 )
                 continue
+            created_contacts += contacts
+            created_properties += contact_properties
 
             # Progress update
             progress = (batch_end / count) * 100
@@ -138,25 +111,196 @@ class Command(BaseCommand):
                 f'Batch {batch_start//batch_size + 1} completed'
             )
 
+        self._report_done(created_contacts, created_properties, started)
+
+    def _create_in_parallel(self, count, batch_size, workers, user):
+        """
+        Create contacts in ``workers`` processes.
+
+        The count is split into shards of SHARD_BATCHES batches, which the
+        pool hands out as workers free up. Each worker opens its own
+        database connection and commits each batch in its own transaction.
+
+        Workers are forked from this process, so they start with Django set
+        up; a spawned worker would import this module, and the models, before
+        django.setup(). They get the user's id and load the rows they need
+        themselves.
+        """
+        shard_size = batch_size * SHARD_BATCHES
+        shards = [
+            min(shard_size, count - shard_start)
+            for shard_start in range(0, count, shard_size)
+        ]
+        self.stdout.write(
+            f'Using {workers} worker processes, {len(shards):,} shards of up to '
+            f'{shard_size:,} contacts')
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite allows one writer at a time; workers will mostly wait on each other.'))
+
+        # Workers must not share the parent's connection
+        connections.close_all()
+
+        created_contacts = 0
+        created_properties = 0
+        done = 0
+        started = time.monotonic()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=init_worker,
+            initargs=(user.pk,)
+        ) as executor:
+            futures = {executor.submit(create_shard, size, batch_size): size for size in shards}
+            for future in as_completed(futures):
+                contacts, contact_properties, shard_errors = future.result()
+                created_contacts += contacts
+                created_properties += contact_properties
+                done += futures[future]
+                for error in shard_errors:
+                    self.stdout.write(self.style.ERROR(f'Error in batch: {error}'))
+
+                elapsed = time.monotonic() - started or 1e-9
+                progress = (done / count) * 100
+                self.stdout.write(
+                    f'Progress: {done:,}/{count:,} contacts ({progress:.1f}%) - '
+                    f'{created_contacts / elapsed:,.0f} contacts/sec, '
+                    f'{created_properties / elapsed:,.0f} properties/sec'
+                )
+
+        # Expire cached responses once more after the last worker commit
+        bump_data_version()
+        self._report_done(created_contacts, created_properties, started)
+
+    def _report_done(self, created_contacts, created_properties, started):
+        elapsed = time.monotonic() - started
+        rate = (created_contacts + created_properties) / elapsed if elapsed else 0
         self.stdout.write(
             self.style.SUCCESS(
                 f'Successfully created {created_contacts:,} contacts with '
-                f'{created_properties:,} properties'
+                f'{created_properties:,} properties in {elapsed:,.1f}s '
+                f'({rate:,.0f} rows/sec)'
             )
         )
 
-    def _generate_singleline_value(self, slug):
-        """Generate appropriate fake data based on property slug"""
-        if slug == 'first_name':
-            return fake.first_name()
-        elif slug == 'last_name':
-            return fake.last_name()
-        elif slug == 'email':
-            return fake.email()
-        elif slug == 'phone_number':
-            return fake.phone_number()
-        elif slug == 'location':
-            return fake.city()
-        else:
-            # Default random string for unknown slugs
-            return ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+    def _delete_existing_contacts(self):
+        """
+        Delete all contacts with plain DELETE statements.
+
+        A queryset delete would load every row to send per-row signals,
+        which is not feasible for millions of contact properties.
+        """
+        tables = [
+            ContactProperty.multipleoption_value.through._meta.db_table,
+            ContactProperty._meta.db_table,
+            FlatContact._meta.db_table,
+            Contact._meta.db_table,
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(table)}')
+        bump_data_version()
+
+
+def generate_singleline_value(slug):
+    """Generate appropriate fake data based on property slug"""
+    if slug == 'first_name':
+        return fake.first_name()
+    elif slug == 'last_name':
+        return fake.last_name()
+    elif slug == 'email':
+        return fake.email()
+    elif slug == 'phone_number':
+        return fake.phone_number()
+    elif slug == 'location':
+        return fake.city()
+    else:
+        # Default random string for unknown slugs
+        return ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+
+
+def load_properties():
+    """Every property, and the options of option properties by property id"""
+    properties = list(Property.objects.all())
+    property_options = {}
+    for prop in properties:
+        if prop.type == 'option':
+            property_options[prop.id] = list(prop.options.all())
+    return properties, property_options
+
+
+def create_batch(size, user, properties, property_options):
+    """
+    Create ``size`` contacts with a value for every property in one transaction.
+
+    Values are generated before the transaction opens (contact ids are
+    UUIDs made in Python), so it only holds the database for the inserts.
+    Returns the number of contacts and contact properties created.
+    """
+    contacts = [Contact(created_by=user, changed_by=user) for _ in range(size)]
+
+    contact_properties_to_create = []
+    for contact in contacts:
+        # Create properties for each contact
+        for prop in properties:
+            contact_prop = ContactProperty(
+                contact=contact,
+                property=prop,
+                created_by=user,
+                changed_by=user
+            )
+
+            # Generate fake data based on property type and slug
+            if prop.type == 'singleline':
+                contact_prop.singleline_value = generate_singleline_value(prop.slug)
+            elif prop.type == 'textarea':
+                contact_prop.richtext_value = fake.text(max_nb_chars=500)
+            elif prop.type == 'option' and prop.id in property_options:
+                options = property_options[prop.id]
+                if options:
+                    contact_prop.singleoption_value = random.choice(options)
+
+            contact_properties_to_create.append(contact_prop)
+
+    with transaction.atomic():
+        Contact.objects.bulk_create(contacts)
+        ContactProperty.objects.bulk_create(contact_properties_to_create, batch_size=500)
+
+        # bulk_create sends no signals; sync the read model
+        # and expire cached responses here
+        refresh_flat_contacts([contact.id for contact in contacts])
+        transaction.on_commit(bump_data_version)
+
+    return len(contacts), len(contact_properties_to_create)
+
+
+# Arguments of create_batch in a worker process, set by init_worker
+_worker_state = {}
+
+
+def init_worker(user_id):
+    """Set up a forked worker process of the parallel mode"""
+    # Forked workers inherit the parent's random state; draw their own
+    random.seed()
+    fake.seed_instance(random.getrandbits(64))
+    properties, property_options = load_properties()
+    _worker_state.update(
+        user=User.objects.get(pk=user_id), properties=properties,
+        property_options=property_options)
+
+
+def create_shard(size, batch_size):
+    """Create ``size`` contacts in batches; return ``(contacts, properties, errors)``"""
+    created_contacts = 0
+    created_properties = 0
+    errors = []
+    for batch_start in range(0, size, batch_size):
+        try:
+            contacts, contact_properties = create_batch(
+                min(batch_size, size - batch_start), **_worker_state)
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        created_contacts += contacts
+        created_properties += contact_properties
+    return created_contacts, created_properties, errors
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from contacts.cache import bump_data_version
+from contacts.models import Contact, FlatContact
+from contacts.read_model import refresh_flat_contacts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized FlatContact read model from contact properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of contacts to rebuild in each batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Delete all read model rows before rebuilding'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['reset']:
+            self.stdout.write(self.style.WARNING(
+                'Deleting existing read model rows...'))
+            FlatContact.objects.all().delete()
+
+        total = Contact.objects.count()
+        self.stdout.write(f'Rebuilding read model for {total:,} contacts...')
+
+        started = time.monotonic()
+        rebuilt = 0
+        batch = []
+        contact_ids = Contact.objects.values_list(
+            'id', flat=True).iterator(chunk_size=batch_size)
+
+        for contact_id in contact_ids:
+            batch.append(contact_id)
+            if len(batch) >= batch_size:
+                rebuilt += self._rebuild_batch(batch, batch_size)
+                batch = []
+                self._report_progress(rebuilt, total, started)
+
+        if batch:
+            rebuilt += self._rebuild_batch(batch, batch_size)
+            self._report_progress(rebuilt, total, started)
+
+        # Responses served from the read model may have changed
+        bump_data_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {rebuilt:,} flat contacts')
+        )
+
+    def _rebuild_batch(self, contact_ids, batch_size):
+        with transaction.atomic():
+            return refresh_flat_contacts(contact_ids, batch_size=batch_size)
+
+    def _report_progress(self, rebuilt, total, started):
+        elapsed = time.monotonic() - started
+        rate = rebuilt / elapsed if elapsed else 0
+        progress = (rebuilt / total) * 100 if total else 100
+        self.stdout.write(
+            f'Progress: {rebuilt:,}/{total:,} contacts ({progress:.1f}%) - '
+            f'{rate:,.0f} contacts/sec'
+        )
@@ -0,0 +1,47 @@
+from django.db.migrations import AddIndex
+
+
+def run_for_vendor(statements_by_vendor):
+    """
+    RunPython code executing the raw SQL statements listed for the current
+    database vendor, e.g. ``{'postgresql': [...], 'sqlite': [...]}``; other
+    vendors run nothing
+    """
+    def operation(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+    return operation
+
+
+class AddIndexConcurrently(AddIndex):
+    """
+    AddIndex that builds the index with CREATE INDEX CONCURRENTLY on
+    PostgreSQL, so it can run against a live table, and falls back to a
+    regular AddIndex on other databases.
+
+    Migrations using it must set ``atomic = False``.
+    """
+    atomic = False
+
+    def describe(self):
+        return 'Concurrently create index %s on %s' % (
+            self.index.name, self.model_name)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
+
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-16 22:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0004_contact_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlatContact',
+            fields=[
+                ('contact', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='flat', serialize=False, to='contacts.contact')),
+                ('values', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Flat Contact',
+                'verbose_name_plural': 'Flat Contacts',
+                'indexes': [models.Index(fields=['created_at', 'contact'], name='flatcontact_created_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,106 @@
+from django.db import migrations
+
+from contacts.migration_operations import run_for_vendor
+
+FTS_TABLE = 'contacts_contactproperty_fts'
+
+# Indexed expressions match the SQL Django emits for `icontains`
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS contactproperty_singleline_trgm '
+    'ON contacts_contactproperty USING gin (UPPER("singleline_value"::text) gin_trgm_ops)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS contactproperty_richtext_trgm '
+    'ON contacts_contactproperty USING gin (UPPER("richtext_value"::text) gin_trgm_ops)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX CONCURRENTLY IF EXISTS contactproperty_singleline_trgm',
+    'DROP INDEX CONCURRENTLY IF EXISTS contactproperty_richtext_trgm',
+]
+
+# Searchable text of a contact property row, by property type
+SQLITE_VALUE = '''
+    CASE (SELECT type FROM contacts_property WHERE id = {row}.property_id)
+        WHEN 'singleline' THEN {row}.singleline_value
+        WHEN 'textarea' THEN {row}.richtext_value
+        WHEN 'option' THEN (
+            SELECT value FROM contacts_option WHERE id = {row}.singleoption_value_id)
+    END
+'''
+
+SQLITE_INSERT = f'''
+    INSERT INTO {FTS_TABLE} (rowid, value, contact_id)
+    SELECT {{row}}.id, {SQLITE_VALUE}, {{row}}.contact_id
+    WHERE {SQLITE_VALUE} IS NOT NULL;
+'''
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"value, contact_id UNINDEXED, tokenize='trigram')",
+
+    f'''CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON contacts_contactproperty BEGIN
+        {SQLITE_INSERT.format(row='new')}
+    END''',
+
+    f'''CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON contacts_contactproperty BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {SQLITE_INSERT.format(row='new')}
+    END''',
+
+    f'''CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON contacts_contactproperty BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END''',
+
+    # Option labels and property types are copied into the index
+    f'''CREATE TRIGGER {FTS_TABLE}_option_au AFTER UPDATE OF value ON contacts_option BEGIN
+        UPDATE {FTS_TABLE} SET value = new.value WHERE rowid IN (
+            SELECT id FROM contacts_contactproperty
+            WHERE singleoption_value_id = new.id);
+    END''',
+
+    f'''CREATE TRIGGER {FTS_TABLE}_property_au AFTER UPDATE OF type ON contacts_property BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid IN (
+            SELECT id FROM contacts_contactproperty WHERE property_id = new.id);
+        INSERT INTO {FTS_TABLE} (rowid, value, contact_id)
+        SELECT cp.id, {SQLITE_VALUE.format(row='cp')}, cp.contact_id
+        FROM contacts_contactproperty cp
+        WHERE cp.property_id = new.id AND {SQLITE_VALUE.format(row='cp')} IS NOT NULL;
+    END''',
+
+    # Backfill existing rows
+    f'''INSERT INTO {FTS_TABLE} (rowid, value, contact_id)
+        SELECT cp.id, {SQLITE_VALUE.format(row='cp')}, cp.contact_id
+        FROM contacts_contactproperty cp
+        WHERE {SQLITE_VALUE.format(row='cp')} IS NOT NULL''',
+]
+
+SQLITE_REVERSE = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_option_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_property_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('contacts', '0005_flatcontact'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({
+                'postgresql': POSTGRES_FORWARD,
+                'sqlite': SQLITE_FORWARD,
+            }),
+            run_for_vendor({
+                'postgresql': POSTGRES_REVERSE,
+                'sqlite': SQLITE_REVERSE,
+            }),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-16 22:36
+
+from django.db import migrations, models
+
+from contacts.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('contacts', '0006_contactproperty_search_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contactproperty',
+            index=models.Index(fields=['property', 'singleline_value'], name='cp_property_singleline_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactproperty',
+            index=models.Index(fields=['property', 'singleoption_value', 'contact'], name='cp_property_option_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactproperty',
+            index=models.Index(fields=['contact', 'property'], include=('singleline_value', 'singleoption_value'), name='cp_contact_property_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from contacts.migration_operations import run_for_vendor
+
+# `singleline_value LIKE 'prefix%'` (the `__startswith` filter operator) can
+# only use a b-tree index with pattern operators under a non-C collation.
+# SQLite needs nothing: the filter becomes a range on cp_property_singleline_idx.
+POSTGRES_FORWARD = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS cp_property_singleline_prefix_idx '
+    'ON contacts_contactproperty (property_id, singleline_value varchar_pattern_ops)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX CONCURRENTLY IF EXISTS cp_property_singleline_prefix_idx',
+]
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('contacts', '0007_contactproperty_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRES_FORWARD}),
+            run_for_vendor({'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
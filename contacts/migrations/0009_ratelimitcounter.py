@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-17 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0008_contactproperty_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('client_key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('window_index', models.BigIntegerField()),
+                ('hits', models.BigIntegerField()),
+                ('previous_hits', models.BigIntegerField()),
+                ('expires_at', models.FloatField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Rate Limit Counter',
+                'verbose_name_plural': 'Rate Limit Counters',
+                'db_table': 'rate_limit_counter',
+            },
+        ),
+    ]
@@ -2,3 +2,5 @@ from .property import Property
 from .option import Option
 from .contact import Contact
 from .contact_property import ContactProperty
+from .flat_contact import FlatContact
+from .rate_limit_counter import RateLimitCounter
@@ -1,5 +1,13 @@
+from django.db import models
+
 from contacts.models.base import BaseModel
 
 
 class Contact(BaseModel):
-    pass
+
+    class Meta:
+        indexes = [
+            # Keyset pagination key
+            models.Index(fields=['created_at', 'id'],
+                         name='contact_created_at_id_idx'),
+        ]
@@ -12,3 +12,19 @@ class ContactProperty(BaseModelProperty):
         unique_together = [
             ["property", "contact"],
         ]
+        indexes = [
+            # "property X with value Y"
+            models.Index(
+                fields=['property', 'singleline_value'],
+                name='cp_property_singleline_idx'),
+            # "option Z for property X", yielding contact ids from the index
+            models.Index(
+                fields=['property', 'singleoption_value', 'contact'],
+                name='cp_property_option_idx'),
+            # Per-contact lookups (EXISTS filters, prefetch); INCLUDE makes
+            # it covering on PostgreSQL
+            models.Index(
+                fields=['contact', 'property'],
+                include=['singleline_value', 'singleoption_value'],
+                name='cp_contact_property_idx'),
+        ]
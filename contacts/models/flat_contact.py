@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class FlatContact(models.Model):
+    """
+    Denormalized read model of a contact.
+
+    One row per contact holding every current property value keyed by
+    slug, with option values stored as ``{code, value, id}``. Rows are
+    maintained by ``contacts.signals`` and rebuilt in bulk by the
+    ``rebuild_flat_contacts`` management command.
+    """
+    contact = models.OneToOneField(
+        "contacts.Contact", primary_key=True, on_delete=models.CASCADE,
+        related_name="flat")
+    values = models.JSONField(default=dict, blank=True)
+
+    # Copied from the contact so listings never join it
+    updated_at = models.DateTimeField()
+    created_at = models.DateTimeField()
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Flat Contact")
+        verbose_name_plural = _("Flat Contacts")
+        indexes = [
+            models.Index(fields=['created_at', 'contact'],
+                         name='flatcontact_created_at_idx'),
+        ]
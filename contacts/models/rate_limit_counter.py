@@ -0,0 +1,22 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class RateLimitCounter(models.Model):
+    """
+    Sliding window counters of one rate limit key.
+
+    Written by ``config.ratelimit.DatabaseRateLimitStore`` with a single
+    upsert per request; ``expires_at`` is a Unix timestamp after which the
+    row is purged.
+    """
+    client_key = models.CharField(max_length=255, primary_key=True)
+    window_index = models.BigIntegerField()
+    hits = models.BigIntegerField()
+    previous_hits = models.BigIntegerField()
+    expires_at = models.FloatField(db_index=True)
+
+    class Meta:
+        db_table = 'rate_limit_counter'
+        verbose_name = _("Rate Limit Counter")
+        verbose_name_plural = _("Rate Limit Counters")
@@ -0,0 +1,172 @@
+"""
+Server-side ordering of contact listings by property values.
+
+``?ordering=last_name,-created_at`` sorts by any property slug or contact
+timestamp, ``-`` meaning descending. Each property key is an aliased scalar
+subquery reading the contact's ContactProperty row of that property (an
+index probe on ``cp_contact_property_idx``); option properties sort by
+``Option.order``. Contacts without a value sort last in either direction,
+and ``id`` breaks ties so page-number pagination is stable. Without the
+parameter, contacts sort by ``(created_at, id)``.
+
+Sorting every filtered contact by a subquery costs a full sort per page, so
+when the first key is a singleline property the paginator first reads the
+sort value of the last row it needs from ``cp_property_singleline_idx`` (an
+ordered index scan of ``top`` entries) and only sorts contacts up to that
+value; see ``seek_bound``.
+"""
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.expressions import OrderBy
+from rest_framework.filters import BaseFilterBackend
+
+from contacts.models import Contact, ContactProperty, FlatContact
+from contacts.registry import property_registry
+
+# Prefix of the aliases holding property sort keys
+ALIAS_PREFIX = 'ordering_'
+
+# Contact columns that can be sorted on directly
+ORDERING_COLUMNS = ('created_at', 'updated_at')
+
+# Column holding the sort key of a property, by type
+SORT_COLUMNS = {
+    'singleline': 'singleline_value',
+    'textarea': 'richtext_value',
+    'option': 'singleoption_value__order',
+}
+
+
+def parse_ordering(value):
+    """
+    Resolve an ``ordering`` parameter to ``[(name, property_meta, descending)]``.
+
+    ``property_meta`` is None for contact columns. Unknown and repeated names
+    are skipped.
+    """
+    ordering = []
+    seen = set()
+    for term in (value or '').split(','):
+        term = term.strip()
+        descending = term.startswith('-')
+        name = term.lstrip('-')
+        if not name or name in seen:
+            continue
+
+        if name in ORDERING_COLUMNS:
+            ordering.append((name, None, descending))
+        else:
+            property_meta = property_registry.get(name)
+            if property_meta is None or property_meta.type not in SORT_COLUMNS:
+                continue
+            ordering.append((name, property_meta, descending))
+        seen.add(name)
+    return ordering
+
+
+def seek_bound(queryset, top):
+    """
+    Narrow an ordered contact queryset to the rows that can be among its first ``top``.
+
+    Applies when the first sort key is a singleline property: the ``top``-th
+    value in that order is read from the (property, value) index, and only
+    contacts whose value is not past it (ties included) are kept. Other
+    orderings, or fewer than ``top`` contacts with a value, return the
+    queryset unchanged. Counting must use the original queryset.
+    """
+    if queryset.model is not Contact or top < 1 or not queryset.query.order_by:
+        return queryset
+
+    first = queryset.query.order_by[0]
+    if not isinstance(first, OrderBy) or not isinstance(first.expression, F):
+        return queryset
+    name = first.expression.name
+    if not name.startswith(ALIAS_PREFIX):
+        return queryset
+    property_meta = property_registry.get(name[len(ALIAS_PREFIX):])
+    if property_meta is None or property_meta.type != 'singleline':
+        return queryset
+
+    column = SORT_COLUMNS[property_meta.type]
+    rows = ContactProperty.objects.filter(
+        property_id=property_meta.id, **{f'{column}__isnull': False})
+    if queryset.query.has_filters():
+        rows = rows.filter(contact_id__in=queryset.values('pk'))
+    bound = list(rows.order_by(
+        f'-{column}' if first.descending else column
+    ).values_list(column, flat=True)[top - 1:top])
+    if not bound:
+        return queryset
+
+    lookup = 'gte' if first.descending else 'lte'
+    return queryset.filter(pk__in=ContactProperty.objects.filter(
+        property_id=property_meta.id, **{f'{column}__{lookup}': bound[0]}
+    ).values('contact_id'))
+
+
+class PropertyOrderingFilter(BaseFilterBackend):
+    """
+    Order contacts (or FlatContact rows) by property values and timestamps,
+    by creation date when no valid ``ordering`` is given
+    """
+    ordering_param = 'ordering'
+    # Same order as exports and cursor pagination, on the (created_at, id) indexes
+    default_ordering = ('created_at', 'pk')
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = parse_ordering(request.query_params.get(self.ordering_param))
+        if not ordering:
+            return queryset.order_by(*self.default_ordering)
+
+        order_by = []
+        for name, property_meta, descending in ordering:
+            if property_meta is None:
+                expression = F(name)
+            else:
+                alias = f'{ALIAS_PREFIX}{name}'
+                queryset = queryset.alias(**{
+                    alias: self.sort_key(queryset.model, property_meta)})
+                expression = F(alias)
+            if descending:
+                order_by.append(expression.desc(nulls_last=True))
+            else:
+                order_by.append(expression.asc(nulls_last=True))
+
+        return queryset.order_by(*order_by, 'pk')
+
+    def sort_key(self, model, property_meta):
+        """Expression of the sort key of ``property_meta`` for each row of ``model``"""
+        if model is FlatContact:
+            return self.flat_sort_key(property_meta)
+
+        return Subquery(
+            ContactProperty.objects.filter(
+                contact_id=OuterRef('pk'),
+                property_id=property_meta.id
+            ).values(SORT_COLUMNS[property_meta.type])[:1]
+        )
+
+    def flat_sort_key(self, property_meta):
+        """Sort key read from the FlatContact JSON, with option orders from the registry"""
+        field = f'values__{property_meta.slug}'
+        if property_meta.type != 'option':
+            return F(field)
+
+        return Case(
+            *[
+                When(**{f'{field}__id': str(option.id)}, then=Value(option.order))
+                for option in property_meta.options
+            ],
+            default=None,
+            output_field=IntegerField()
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.ordering_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Comma-separated property slugs, created_at or updated_at to sort by; '
+                           'prefix with "-" for descending. Contacts without a value come last. '
+                           'Defaults to created_at.',
+            'schema': {'type': 'string'},
+        }]
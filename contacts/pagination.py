@@ -0,0 +1,434 @@
+import base64
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (
+    BasePagination, PageNumberPagination, _positive_int)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from contacts.cache import get_data_version
+from contacts.ordering import seek_bound
+from contacts.utils import query_signature
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATED = 'estimated'
+COUNT_CACHED = 'cached'
+COUNT_NONE = 'none'
+COUNT_STRATEGIES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_CACHED, COUNT_NONE)
+
+
+class ContactPage(Page):
+    """Page that may know whether a next page exists without a total count"""
+    has_more = None
+
+    def has_next(self):
+        if self.has_more is not None:
+            return self.has_more
+        return super().has_next()
+
+
+class ContactPaginator(Paginator):
+    """
+    Paginator with a configurable count strategy.
+
+    * ``exact``: ``COUNT`` over the filtered queryset (Django's default).
+    * ``estimated``: planner estimate on PostgreSQL (``reltuples`` for an
+      unfiltered listing, ``EXPLAIN`` row estimate otherwise); exact
+      elsewhere.
+    * ``cached``: exact count cached under ``cache_key`` for
+      ``cache_timeout`` seconds.
+    * ``none``: no count at all.
+
+    Except for ``exact``, page numbers are not validated against the count
+    and the next page is detected by fetching one extra row, so an estimate
+    that is too low never hides existing rows.
+    """
+
+    def __init__(self, object_list, per_page, count_strategy=COUNT_EXACT,
+                 cache_key=None, cache_timeout=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count_strategy
+        self.cache_key = cache_key
+        self.cache_timeout = cache_timeout
+        # Strategy actually applied, e.g. ``exact`` when no estimate exists
+        self.count_strategy_used = count_strategy
+
+    def _get_page(self, *args, **kwargs):
+        return ContactPage(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.count_strategy == COUNT_NONE:
+            return None
+
+        if self.count_strategy == COUNT_CACHED and self.cache_key:
+            count = cache.get(self.cache_key)
+            if count is None:
+                count = self.object_list.count()
+                cache.set(self.cache_key, count, self.cache_timeout)
+            return count
+
+        if self.count_strategy == COUNT_ESTIMATED:
+            count = self._estimate_count()
+            if count is not None:
+                return count
+
+        self.count_strategy_used = COUNT_EXACT
+        return self.object_list.count()
+
+    def _estimate_count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        if not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            # reltuples is -1 (or 0) until the table has been analyzed
+            if row and row[0] > 0:
+                return row[0]
+
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    async def acount(self):
+        """Resolve ``count`` with the async ORM; later ``count`` reads reuse it"""
+        if 'count' not in self.__dict__:
+            self.__dict__['count'] = await self._acount()
+        return self.count
+
+    async def _acount(self):
+        if self.count_strategy == COUNT_NONE:
+            return None
+
+        if self.count_strategy == COUNT_CACHED and self.cache_key:
+            count = await cache.aget(self.cache_key)
+            if count is None:
+                count = await self.object_list.acount()
+                await cache.aset(self.cache_key, count, self.cache_timeout)
+            return count
+
+        if self.count_strategy == COUNT_ESTIMATED:
+            count = await sync_to_async(self._estimate_count)()
+            if count is not None:
+                return count
+
+        self.count_strategy_used = COUNT_EXACT
+        return await self.object_list.acount()
+
+    @property
+    def is_exact(self):
+        return self.count_strategy == COUNT_EXACT
+
+    def validate_number(self, number):
+        if self.is_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise InvalidPage('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page_queryset(self, top):
+        """``object_list`` narrowed to the rows that can be among its first ``top``"""
+        return seek_bound(self.object_list, top)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if self.is_exact:
+            top = bottom + self.per_page
+            if top + self.orphans >= self.count:
+                top = self.count
+            return self._get_page(
+                list(self.page_queryset(top)[bottom:top]), number, self)
+
+        top = bottom + self.per_page + 1
+        rows = list(self.page_queryset(top)[bottom:top])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    async def apage(self, number):
+        """
+        Same as ``page()``, with the rows fetched by the async ORM.
+
+        ``acount()`` must have been awaited first.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if self.is_exact:
+            top = bottom + self.per_page
+            if top + self.orphans >= self.count:
+                top = self.count
+            return self._get_page(await self._afetch(bottom, top), number, self)
+
+        rows = await self._afetch(bottom, bottom + self.per_page + 1)
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    async def _afetch(self, bottom, top):
+        queryset = await sync_to_async(self.page_queryset)(top)
+        # A single chunk, so prefetches run once for the whole page
+        queryset = queryset[bottom:top]
+        chunk_size = max(top - bottom, 1)
+        return [obj async for obj in queryset.aiterator(chunk_size=chunk_size)]
+
+
+class ContactPagination(PageNumberPagination):
+    """Custom pagination for contacts"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    django_paginator_class = ContactPaginator
+    count_query_param = 'count'
+    # Parameters that do not change which contacts are counted
+    count_ignored_params = ('page', 'page_size', 'display', 'cursor', 'count', 'ordering')
+
+    def get_count_strategy(self, request, view=None):
+        """Strategy requested by the client, else the view or settings default"""
+        strategy = request.query_params.get(self.count_query_param)
+        if strategy in COUNT_STRATEGIES:
+            return strategy
+        strategy = getattr(view, 'count_strategy', None)
+        return strategy or getattr(settings, 'CONTACTS_COUNT_STRATEGY', COUNT_EXACT)
+
+    def get_count_cache_key(self, request):
+        signature = query_signature(
+            request.query_params, exclude=self.count_ignored_params)
+        return f'contacts:count:{get_data_version()}:{signature}'
+
+    def get_paginator(self, queryset, page_size, request, view=None):
+        return self.django_paginator_class(
+            queryset, page_size,
+            count_strategy=self.get_count_strategy(request, view),
+            cache_key=self.get_count_cache_key(request),
+            cache_timeout=getattr(settings, 'CONTACTS_COUNT_CACHE_TIMEOUT', 60)
+        )
+
+    def get_page_number(self, request, paginator):
+        page_number = request.query_params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            if not paginator.is_exact:
+                raise NotFound(self.invalid_page_message.format(
+                    page_number=page_number, message='Last page requires an exact count'))
+            page_number = paginator.num_pages
+        return page_number
+
+    def get_page_not_found(self, page_number, exc):
+        return NotFound(self.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        ))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.get_paginator(queryset, page_size, request, view)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise self.get_page_not_found(page_number, exc)
+
+        return list(self.page)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset()`` for async views, using the async ORM"""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.get_paginator(queryset, page_size, request, view)
+        await paginator.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = await paginator.apage(page_number)
+        except InvalidPage as exc:
+            raise self.get_page_not_found(page_number, exc)
+
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        paginator = self.page.paginator
+        return Response({
+            'count': paginator.count,
+            'count_strategy': paginator.count_strategy_used,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        response_schema['properties']['count_strategy'] = {
+            'type': 'string',
+            'enum': list(COUNT_STRATEGIES),
+            'example': COUNT_EXACT,
+        }
+        return response_schema
+
+
+class ContactCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(created_at, id)``.
+
+    Each page is fetched with a range predicate on the last seen position
+    instead of an OFFSET, and no total count is computed, so every page
+    costs the same regardless of depth. Cursors are opaque tokens. The
+    order is fixed, so an ``ordering`` parameter is rejected.
+    """
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size = ContactPagination.page_size
+    page_size_query_param = ContactPagination.page_size_query_param
+    max_page_size = ContactPagination.max_page_size
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        # Fetch one extra row to know whether another page follows
+        return self.set_page(list(queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset()`` for async views, using the async ORM"""
+        queryset = self.get_page_queryset(queryset, request)
+        limit = self.page_size + 1
+        return self.set_page([
+            obj async for obj in queryset[:limit].aiterator(chunk_size=limit)])
+
+    def get_page_queryset(self, queryset, request):
+        """Filter and order ``queryset`` for the requested cursor position"""
+        self.request = request
+        if request.query_params.get(self.ordering_query_param, '').strip():
+            raise ValidationError({self.ordering_query_param: [
+                'Cursor pagination is always ordered by creation date; '
+                'use page numbers to sort by other fields.']})
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), 'page')
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        self.position = position
+        self.reverse = reverse
+
+        if position is not None:
+            created_at, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+        if reverse:
+            return queryset.order_by('-created_at', '-pk')
+        return queryset.order_by('created_at', 'pk')
+
+    def set_page(self, results):
+        """Keep a page of at most ``page_size`` rows and note its neighbours"""
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_previous = has_more
+            self.has_next = self.position is not None
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        """Return ``((created_at, id), reverse)`` for the requested cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = parse_datetime(data['c'])
+            pk = uuid.UUID(str(data['i']))
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
+
+    def encode_cursor(self, obj, reverse=False):
+        data = {'c': obj.created_at.isoformat(), 'i': str(obj.pk)}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode('ascii'))
+        token = encoded.decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
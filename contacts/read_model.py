@@ -0,0 +1,74 @@
+"""
+Maintenance of the FlatContact read model.
+
+Every function here rebuilds rows from the EAV tables, so it is safe to call
+for any contact at any time.
+"""
+from contacts.models import Contact, ContactProperty, FlatContact
+from contacts.registry import property_registry
+from contacts.serializers.contact import get_property_value
+
+REFRESH_BATCH_SIZE = 500
+
+
+def build_flat_values(contact_properties):
+    """Map ``contact_id -> {slug: value}`` for the given property rows"""
+    values_by_contact = {}
+    for contact_property in contact_properties:
+        property_meta = property_registry.get_by_id(contact_property.property_id)
+        # Skip rows of a property shadowed by an older one with the same slug
+        if property_meta is None or property_registry.get(property_meta.slug) is not property_meta:
+            continue
+        values = values_by_contact.setdefault(contact_property.contact_id, {})
+        values[property_meta.slug] = get_property_value(
+            property_meta, contact_property)
+    return values_by_contact
+
+
+def refresh_flat_contacts(contact_ids, batch_size=REFRESH_BATCH_SIZE):
+    """Rebuild the FlatContact rows of the given contacts"""
+    contact_ids = list(dict.fromkeys(contact_ids))
+    refreshed = 0
+    for start in range(0, len(contact_ids), batch_size):
+        chunk = contact_ids[start:start + batch_size]
+        contacts = Contact.objects.filter(pk__in=chunk).only(
+            'id', 'created_at', 'updated_at')
+        contact_properties = ContactProperty.objects.filter(
+            contact_id__in=chunk
+        ).select_related('singleoption_value').only(
+            'contact_id', 'property_id', 'singleline_value',
+            'richtext_value', 'singleoption_value'
+        )
+        values_by_contact = build_flat_values(contact_properties)
+
+        rows = [
+            FlatContact(
+                contact_id=contact.id,
+                values=values_by_contact.get(contact.id, {}),
+                created_at=contact.created_at,
+                updated_at=contact.updated_at
+            )
+            for contact in contacts
+        ]
+        FlatContact.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['contact'],
+            update_fields=['values', 'created_at', 'updated_at', 'refreshed_at']
+        )
+        refreshed += len(rows)
+    return refreshed
+
+
+def refresh_contacts_with_property(property_id):
+    """Rebuild every contact that has a value for the given property"""
+    contact_ids = ContactProperty.objects.filter(
+        property_id=property_id).values_list('contact_id', flat=True)
+    return refresh_flat_contacts(contact_ids)
+
+
+def refresh_contacts_with_option(option_id):
+    """Rebuild every contact that selected the given option"""
+    contact_ids = ContactProperty.objects.filter(
+        singleoption_value_id=option_id).values_list('contact_id', flat=True)
+    return refresh_flat_contacts(contact_ids)
@@ -0,0 +1,217 @@
+"""
+In-process registry of Property and Option metadata.
+
+Properties and options change rarely but are looked up on every contact
+request (filters, display fields, search). The registry loads them once per
+worker and serves every lookup from memory. It is invalidated locally by the
+signals in ``contacts.signals`` and across workers through a version stamp
+kept in the Django cache.
+"""
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+
+from contacts.cache import bump_version, get_version
+
+SCHEMA_VERSION = 'schema_version'
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@dataclass(frozen=True)
+class OptionMeta:
+    id: object
+    property_id: object
+    code: str
+    value: str
+    order: int
+
+    def as_dict(self):
+        """Representation used by the contact API"""
+        return {
+            'code': self.code,
+            'value': self.value,
+            'id': str(self.id)
+        }
+
+
+@dataclass(frozen=True)
+class PropertyMeta:
+    id: object
+    slug: str
+    name: str
+    type: str
+    options: tuple = ()
+
+    def get_option(self, code):
+        """Get an option of this property by its code"""
+        for option in self.options:
+            if option.code == code:
+                return option
+        return None
+
+    def match_options(self, value):
+        """Options whose code equals ``value`` or whose label contains it"""
+        needle = value.lower()
+        return [
+            option for option in self.options
+            if option.code == value or needle in option.value.lower()
+        ]
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """One consistent load of the registry, swapped in as a whole"""
+    by_slug: dict
+    by_id: dict
+    options: dict
+
+
+class PropertyRegistry:
+    """Slug/id indexed view of all properties and their options"""
+    # Seconds between reads of the shared version stamp. Changes made in
+    # this process are seen at once, since invalidate() marks the local copy
+    # stale; other workers pick them up within this interval.
+    version_check_interval = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        # Readers take this reference once and never see it change under
+        # them; it is None only before the first load
+        self._snapshot = None
+        self._stale = False
+
+    def _shared_version(self):
+        return get_version(SCHEMA_VERSION)
+
+    def _current(self):
+        """The loaded snapshot, reloaded first when stale or out of date"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if (snapshot is not None and not self._stale and self._checked_at is not None
+                and now - self._checked_at < self.version_check_interval):
+            return snapshot
+
+        version = self._shared_version()
+        if snapshot is not None and not self._stale and self._version == version:
+            self._checked_at = now
+            return snapshot
+        if snapshot is not None and _in_event_loop():
+            # Loading runs queries, which async code must not do inline;
+            # serve the previous copy until the next aload()
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._stale or self._version != version:
+                self._load(version)
+            return self._snapshot
+
+    def _load(self, version):
+        from contacts.models import Option, Property
+
+        # Cleared before reading, so an invalidate() during the load is kept
+        self._stale = False
+        options_by_property = {}
+        options = {}
+        for option in Option.objects.order_by('order', 'value'):
+            option_meta = OptionMeta(
+                id=option.id,
+                property_id=option.property_id,
+                code=option.code,
+                value=option.value,
+                order=option.order
+            )
+            options[option.id] = option_meta
+            options_by_property.setdefault(
+                option.property_id, []).append(option_meta)
+
+        by_slug = {}
+        by_id = {}
+        for prop in Property.objects.order_by('created_at'):
+            property_meta = PropertyMeta(
+                id=prop.id,
+                slug=prop.slug,
+                name=prop.name,
+                type=prop.type,
+                options=tuple(options_by_property.get(prop.id, ()))
+            )
+            by_id[prop.id] = property_meta
+            # Slugs are only unique per type; keep the oldest property
+            by_slug.setdefault(prop.slug, property_meta)
+
+        self._snapshot = RegistrySnapshot(by_slug=by_slug, by_id=by_id, options=options)
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    async def aload(self):
+        """Make sure the registry is loaded and current, from async code"""
+        await sync_to_async(self._current)()
+
+    def invalidate(self):
+        """Mark the local copy stale and bump the shared version stamp"""
+        self._stale = True
+        bump_version(SCHEMA_VERSION)
+
+    def get(self, slug):
+        """Get property metadata by slug, or None"""
+        return self._current().by_slug.get(slug)
+
+    def get_by_id(self, property_id):
+        """Get property metadata by primary key, or None"""
+        return self._current().by_id.get(property_id)
+
+    def get_option(self, option_id):
+        """Get option metadata by primary key, or None"""
+        return self._current().options.get(option_id)
+
+    def all(self):
+        """All properties in creation order"""
+        return list(self._current().by_slug.values())
+
+    def ids_of_type(self, property_type):
+        """Primary keys of every property of the given type"""
+        return [
+            prop.id for prop in self._current().by_id.values()
+            if prop.type == property_type
+        ]
+
+    def search_options(self, value):
+        """Primary keys of every option whose label contains ``value``"""
+        needle = value.lower()
+        return [
+            option.id for option in self._current().options.values()
+            if needle in option.value.lower()
+        ]
+
+    def resolve_display(self, display_param):
+        """
+        Resolve a comma-separated ``display`` parameter to property metadata.
+
+        Unknown slugs are skipped; an empty parameter selects all properties.
+        """
+        slugs = [
+            slug.strip() for slug in (display_param or '').split(',')
+            if slug.strip()
+        ]
+        if not slugs:
+            return self.all()
+
+        resolved = []
+        for slug in slugs:
+            property_meta = self.get(slug)
+            if property_meta is not None:
+                resolved.append(property_meta)
+        return resolved
+
+
+property_registry = PropertyRegistry()
@@ -0,0 +1,64 @@
+"""
+Renderers for the contact export.
+
+Besides ``render()``, used by DRF for regular (e.g. error) responses, each
+renderer has a ``stream()`` generator that encodes rows one at a time for a
+``StreamingHttpResponse``.
+"""
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """One JSON object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+    def stream(self, rows, fields=None):
+        for row in rows:
+            yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+class EchoBuffer:
+    """File-like object handing back what the csv writer writes"""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma-separated values with a header row; options export their label"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0].keys()) if rows else []
+        return ''.join(self.stream(rows, fields)).encode(self.charset)
+
+    def stream(self, rows, fields):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([self.format_value(row.get(field)) for field in fields])
+
+    def format_value(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, dict):
+            # Option values: {'code', 'value', 'id'}
+            return value.get('value', '')
+        return value
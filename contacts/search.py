@@ -0,0 +1,104 @@
+"""
+Search backends for the contact ``search`` parameter.
+
+Every backend returns the ids of contacts with a singleline, textarea or
+option value containing the search term (case-insensitive), so results are
+the same whichever one is in use:
+
+* ``substring``: plain ``icontains`` over ContactProperty.
+* ``trigram``: the same query on PostgreSQL, where migration 0006 adds
+  ``pg_trgm`` GIN indexes on exactly the ``UPPER(col::text)`` expressions
+  Django generates for ``icontains``.
+* ``fts``: SQLite FTS5 table with the trigram tokenizer, maintained by
+  triggers from migration 0006.
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from contacts.models import ContactProperty
+from contacts.registry import property_registry
+
+FTS_TABLE = 'contacts_contactproperty_fts'
+
+
+class SubstringSearchBackend:
+    """Case-insensitive substring match on every property value"""
+
+    def matching_contact_ids(self, value, using='default'):
+        """Subquery of the ids of contacts matching ``value``"""
+        search_query = Q()
+
+        # Search in all singleline properties
+        search_query |= Q(
+            property_id__in=property_registry.ids_of_type('singleline'),
+            singleline_value__icontains=value
+        )
+
+        # Search in all textarea properties
+        search_query |= Q(
+            property_id__in=property_registry.ids_of_type('textarea'),
+            richtext_value__icontains=value
+        )
+
+        # Search in all option properties
+        search_query |= Q(
+            singleoption_value_id__in=property_registry.search_options(value)
+        )
+
+        return ContactProperty.objects.using(using).filter(
+            search_query).values('contact_id')
+
+    def filter(self, queryset, value):
+        """Restrict a contact (or read model) queryset to matching contacts"""
+        return queryset.filter(
+            pk__in=self.matching_contact_ids(value, using=queryset.db))
+
+
+class TrigramSearchBackend(SubstringSearchBackend):
+    """Substring search served by pg_trgm GIN indexes on PostgreSQL"""
+
+
+class SQLiteFTSSearchBackend(SubstringSearchBackend):
+    """Substring search through the SQLite FTS5 trigram index"""
+    # The trigram tokenizer cannot match terms shorter than one trigram
+    min_length = 3
+
+    def matching_contact_ids(self, value, using='default'):
+        if len(value) < self.min_length:
+            return super().matching_contact_ids(value, using=using)
+
+        phrase = '"%s"' % value.replace('"', '""')
+        return RawSQL(
+            f'SELECT contact_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [phrase]
+        )
+
+
+BACKENDS = {
+    'substring': SubstringSearchBackend,
+    'trigram': TrigramSearchBackend,
+    'fts': SQLiteFTSSearchBackend,
+}
+
+DEFAULT_BACKENDS = {
+    'postgresql': 'trigram',
+    'sqlite': 'fts',
+}
+
+
+def get_search_backend(using='default'):
+    """
+    Search backend for a database.
+
+    ``CONTACTS_SEARCH_BACKEND`` may name one of ``BACKENDS`` or give a dotted
+    path; by default the backend is picked from the database vendor.
+    """
+    name = getattr(settings, 'CONTACTS_SEARCH_BACKEND', None)
+    if not name:
+        name = DEFAULT_BACKENDS.get(connections[using].vendor, 'substring')
+    if name in BACKENDS:
+        return BACKENDS[name]()
+    return import_string(name)()
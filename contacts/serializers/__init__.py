@@ -1,3 +1,8 @@
-from .contact import ContactSerializer, ContactPropertyDetailSerializer
+from .contact import (
+    ContactSerializer, ContactDetailSerializer, ContactPropertyDetailSerializer,
+    FlatContactSerializer)
 
-__all__ = ['ContactSerializer', 'ContactPropertyDetailSerializer']
+__all__ = [
+    'ContactSerializer', 'ContactDetailSerializer', 'ContactPropertyDetailSerializer',
+    'FlatContactSerializer'
+]
@@ -1,6 +1,44 @@
-import types
 from rest_framework import serializers
-from contacts.models import Contact, ContactProperty, Property
+from contacts.models import Contact, ContactProperty, FlatContact
+from contacts.registry import property_registry
+
+
+def get_property_value(property_meta, contact_property):
+    """Get the API value of a property row according to its type"""
+    if property_meta.type == 'singleline':
+        return contact_property.singleline_value
+
+    elif property_meta.type == 'textarea':
+        return contact_property.richtext_value
+
+    elif property_meta.type == 'option':
+        option_id = contact_property.singleoption_value_id
+        if option_id is None:
+            return None
+        option_meta = property_registry.get_option(option_id)
+        if option_meta is not None:
+            return option_meta.as_dict()
+        option = contact_property.singleoption_value
+        return {
+            'code': option.code,
+            'value': option.value,
+            'id': str(option.id)
+        }
+
+    return None
+
+
+class PropertyValueField(serializers.Field):
+    """Read-only field serving one property value of a contact"""
+
+    def __init__(self, property_meta, **kwargs):
+        self.property_meta = property_meta
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return self.parent.get_property_value(obj, self.property_meta)
 
 
 class ContactSerializer(serializers.ModelSerializer):
@@ -16,65 +54,61 @@ class ContactSerializer(serializers.ModelSerializer):
 
         # Get display fields from request context
         request = self.context.get('request')
-        display_fields = []
+        display_param = ''
+        if request:
+            display_param = request.query_params.get('display', '')
+
+        # Create dynamic fields for each requested property; an empty
+        # display parameter selects every property
+        for property_meta in property_registry.resolve_display(display_param):
+            self.fields[property_meta.slug] = PropertyValueField(property_meta)
+
+    def get_property_value(self, obj, property_meta):
+        return self.get_property_values(obj).get(property_meta.id)
+
+    def get_property_values(self, obj):
+        """
+        Pivot the contact's property rows into a property id -> value map.
+
+        The rows come from ``obj.contactpropertys.all()`` so a prefetch set
+        up by the view is reused; the map is built once per contact and
+        shared by every displayed field.
+        """
+        values = getattr(obj, '_property_values', None)
+        if values is None:
+            values = {}
+            for contact_property in obj.contactpropertys.all():
+                property_meta = property_registry.get_by_id(
+                    contact_property.property_id)
+                if property_meta is not None:
+                    values[property_meta.id] = get_property_value(
+                        property_meta, contact_property)
+            obj._property_values = values
+        return values
+
+
+class FlatContactSerializer(serializers.ModelSerializer):
+    """Dynamic contact serializer reading from the FlatContact read model"""
+    id = serializers.UUIDField(source='contact_id', read_only=True)
 
+    class Meta:
+        model = FlatContact
+        fields = ['id', 'created_at', 'updated_at']
+
+    def __init__(self, *args, **kwargs):
+        """Initialize serializer with dynamic fields based on display parameter"""
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        display_param = ''
         if request:
             display_param = request.query_params.get('display', '')
-            if display_param:
-                display_fields = [
-                    field.strip() for field in display_param.split(',') if field.strip()]
-
-        # If no display fields specified, show all available properties
-        if not display_fields:
-            display_fields = list(
-                Property.objects.values_list('slug', flat=True))
-
-        # Create dynamic fields for each requested property
-        for field_slug in display_fields:
-            try:
-                property_obj = Property.objects.get(slug=field_slug)
-                self.fields[field_slug] = serializers.SerializerMethodField()
-
-                # Create the dynamic method for this field
-                method_name = f'get_{field_slug}'
-                # Bind the method to this instance
-                getter_func = self._create_property_getter(property_obj)
-                setattr(self, method_name, types.MethodType(getter_func, self))
-
-            except Property.DoesNotExist:
-                # Skip non-existent properties
-                continue
-
-    def _create_property_getter(self, property_obj):
-        """Create a getter method for a specific property"""
-
-        def getter(self, obj):
-            """Get the value for this property"""
-            try:
-                contact_property = obj.contactpropertys.get(
-                    property=property_obj)
-
-                if property_obj.type == 'singleline':
-                    return contact_property.singleline_value
-
-                elif property_obj.type == 'textarea':
-                    return contact_property.richtext_value
-
-                elif property_obj.type == 'option':
-                    if contact_property.singleoption_value:
-                        return {
-                            'code': contact_property.singleoption_value.code,
-                            'value': contact_property.singleoption_value.value,
-                            'id': str(contact_property.singleoption_value.id)
-                        }
-                    return None
-
-            except ContactProperty.DoesNotExist:
-                return None
 
-            return None
+        for property_meta in property_registry.resolve_display(display_param):
+            self.fields[property_meta.slug] = PropertyValueField(property_meta)
 
-        return getter
+    def get_property_value(self, obj, property_meta):
+        return obj.values.get(property_meta.slug)
 
 
 class ContactPropertyDetailSerializer(serializers.ModelSerializer):
@@ -120,3 +154,13 @@ class ContactPropertyDetailSerializer(serializers.ModelSerializer):
             'property_type': data['property_type'],
             'value': value
         }
+
+
+class ContactDetailSerializer(serializers.ModelSerializer):
+    """A contact with every property it has a value for"""
+    properties = ContactPropertyDetailSerializer(
+        source='contactpropertys', many=True, read_only=True)
+
+    class Meta:
+        model = Contact
+        fields = ['id', 'created_at', 'updated_at', 'properties']
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+
+from contacts.cache import bump_data_version
+from contacts.models import Contact, ContactProperty, Option, Property
+from contacts.read_model import (
+    refresh_contacts_with_option, refresh_contacts_with_property,
+    refresh_flat_contacts)
+from contacts.registry import property_registry
+
+
+def deleted_with(origin, *models):
+    """Whether a delete started from an instance or queryset of ``models``"""
+    return isinstance(origin, models) or getattr(origin, 'model', None) in models
+
+
+def cascaded_from_schema(sender, origin):
+    """Whether a ``sender`` row goes away in the cascade of an option or property delete"""
+    return (
+        deleted_with(origin, Option, Property)
+        and sender is not getattr(origin, 'model', type(origin)))
+
+
+@receiver([post_save, post_delete], sender=Property)
+@receiver([post_save, post_delete], sender=Option)
+def invalidate_property_registry(sender, **kwargs):
+    """Reload property metadata after any schema change"""
+    property_registry.invalidate()
+    # Invalidate again once committed so no worker keeps a pre-commit copy
+    transaction.on_commit(property_registry.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Contact)
+@receiver([post_save, post_delete], sender=ContactProperty)
+@receiver([post_save, post_delete], sender=Property)
+@receiver([post_save, post_delete], sender=Option)
+def invalidate_contact_responses(sender, origin=None, **kwargs):
+    """Expire cached contact responses and counts after any data change"""
+    # A cascade is expired once, by the option or property it started from
+    if cascaded_from_schema(sender, origin):
+        return
+    bump_data_version()
+    # Bump again once committed so nothing read before the commit is reused
+    transaction.on_commit(bump_data_version)
+
+
+@receiver(post_migrate)
+def reset_version_stamps(sender, **kwargs):
+    """
+    Start a migrated database from fresh version stamps, so nothing cached
+    for an earlier database of the same name (e.g. a previous test run) is
+    served for it
+    """
+    if sender.label == 'contacts':
+        bump_data_version()
+        property_registry.invalidate()
+
+
+# Read model receivers are connected after the registry one so they build
+# rows from fresh metadata.
+
+@receiver(post_save, sender=Contact)
+def refresh_flat_contact(sender, instance, **kwargs):
+    """Create or update the read model row of a saved contact"""
+    refresh_flat_contacts([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ContactProperty)
+def refresh_flat_contact_values(sender, instance, origin=None, **kwargs):
+    """Rebuild the read model row of a contact whose values changed"""
+    if instance.contact_id is None:
+        return
+    # The row goes away with the contact itself
+    if deleted_with(origin, Contact):
+        return
+    # Refreshed in one batch once the option or property is gone
+    if cascaded_from_schema(sender, origin):
+        return
+    refresh_flat_contacts([instance.contact_id])
+
+
+@receiver(pre_delete, sender=Property)
+@receiver(pre_delete, sender=Option)
+def refresh_flat_contacts_after_delete(sender, instance, origin=None, **kwargs):
+    """
+    Rebuild the contacts holding a value of a deleted option or property, in
+    one batch once the delete commits: the cascaded value rows are deleted
+    after the option or property itself
+    """
+    if cascaded_from_schema(sender, origin):
+        return
+    if sender is Property:
+        contact_properties = ContactProperty.objects.filter(property_id=instance.pk)
+    else:
+        contact_properties = ContactProperty.objects.filter(singleoption_value_id=instance.pk)
+    contact_ids = list(contact_properties.values_list('contact_id', flat=True).distinct())
+    if contact_ids:
+        transaction.on_commit(lambda: refresh_flat_contacts(contact_ids))
+
+
+@receiver(post_save, sender=Property)
+def refresh_flat_contacts_for_property(sender, instance, created, **kwargs):
+    """A renamed slug moves the key of every contact holding the property"""
+    if not created:
+        refresh_contacts_with_property(instance.pk)
+
+
+@receiver(post_save, sender=Option)
+def refresh_flat_contacts_for_option(sender, instance, created, **kwargs):
+    """Option code and label changes are copied into every contact using it"""
+    if not created:
+        refresh_contacts_with_option(instance.pk)
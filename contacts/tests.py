@@ -1,18 +1,81 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import json
+import socketserver
+import subprocess
+import sys
+import threading
+import uuid
+import warnings
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework import status
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from contacts.models import Contact, Property, Option, ContactProperty
+from config.middleware import (
+    APIRateLimitMiddleware, QueryAccountingMiddleware, RepeatedQueryError, query_fingerprint)
+from config.ratelimit import (
+    CacheRateLimitStore, DatabaseRateLimitStore, InMemoryRateLimitStore, RedisRateLimitStore,
+    PrefixRouter, RequestCost, SlidingWindowRateLimiter, read_reply, rate_limit_data)
+from config.renderers import FastJSONRenderer
+from contacts.models import (
+    Contact, Property, Option, ContactProperty, FlatContact, RateLimitCounter)
+from contacts.read_model import refresh_flat_contacts
+from contacts.registry import property_registry
+from contacts.search import SQLiteFTSSearchBackend, SubstringSearchBackend
+from contacts.views.export import ContactExportAPIView
 
 User = get_user_model()
 
 
+def run_in_other_process(code):
+    """
+    Run Python code in a separate Django process using the test database,
+    as another web worker or a management command would
+    """
+    setup = (
+        'from django.db import connection\n'
+        f'connection.settings_dict["NAME"] = {str(connection.settings_dict["NAME"])!r}\n')
+    subprocess.run(
+        [sys.executable, 'manage.py', 'shell', '-c', setup + code],
+        cwd=settings.BASE_DIR, check=True, capture_output=True)
+
+
+def strict_queries(cls):
+    """
+    Fail any request of the test case that repeats a query like an N+1.
+
+    Fixtures hold three contacts, so a per-contact query runs three times.
+    """
+    return override_settings(
+        QUERY_ACCOUNTING_STRICT=True, QUERY_ACCOUNTING_MAX_REPEATS=2)(cls)
+
+
+@strict_queries
 class ContactListAPIViewTest(APITestCase):
     """Unit tests for ContactListAPIView"""
 
     def setUp(self):
         """Set up test data"""
+        # Every test shares the client IP; start with a fresh rate limit
+        rate_limit_data.clear()
+
         # Create test user
         self.user = User.objects.create_user(
             username='testuser',
@@ -363,6 +426,18 @@ class ContactListAPIViewTest(APITestCase):
         self.assertEqual(contact['last_name'], 'Doe')
         self.assertEqual(contact['department']['code'], 'it')
 
+    def test_filters_compile_without_distinct(self):
+        """Test that stacked filters need neither joins nor DISTINCT"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {
+                'department': 'it', 'status': 'active',
+                'first_name': 'jo', 'search': 'company'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(
+            response.data['results'][0]['id'], str(self.contact1.id))
+        for query in queries.captured_queries:
+            self.assertNotIn('DISTINCT', query['sql'])
+
     def test_pagination(self):
         """Test pagination functionality"""
         # Test with custom page size
@@ -377,6 +452,346 @@ class ContactListAPIViewTest(APITestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertIsNone(response.data['next'])
 
+    def test_cursor_pagination(self):
+        """Test keyset pagination through next and previous cursors"""
+        response = self.client.get(self.url, {'cursor': '', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        first_page = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(first_page), 2)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        second_page = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(second_page), 1)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(
+            set(first_page + second_page),
+            {str(self.contact1.id), str(self.contact2.id), str(self.contact3.id)})
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in response.data['results']], first_page)
+        self.assertIsNone(response.data['previous'])
+
+    def test_cursor_pagination_with_filters(self):
+        """Test keyset pagination combined with property filters and search"""
+        response = self.client.get(
+            self.url, {'cursor': '', 'page_size': 1, 'department': 'it'})
+        ids = [response.data['results'][0]['id']]
+        response = self.client.get(response.data['next'])
+        ids += [item['id'] for item in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(
+            sorted(ids), sorted([str(self.contact1.id), str(self.contact3.id)]))
+
+        response = self.client.get(
+            self.url, {'cursor': '', 'search': 'company.com', 'page_size': 5})
+        self.assertEqual(len(response.data['results']), 3)
+
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # A well-formed cursor with a tampered id
+        for pk in ('notauuid', 12):
+            tampered = base64.urlsafe_b64encode(json.dumps(
+                {'c': '2020-01-01T00:00:00Z', 'i': pk}).encode()).decode().rstrip('=')
+            response = self.client.get(self.url, {'cursor': tampered})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # The keyset order is fixed
+        response = self.client.get(self.url, {'cursor': '', 'ordering': 'last_name'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', response.data)
+
+    def test_count_strategies(self):
+        """Test that each count strategy is applied and reported"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count_strategy'], 'exact')
+
+        # No planner estimate outside PostgreSQL, so the count stays exact
+        response = self.client.get(self.url, {'count': 'estimated'})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['count_strategy'], 'exact')
+
+        response = self.client.get(
+            self.url, {'count': 'none', 'page_size': 2})
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(response.data['count_strategy'], 'none')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(
+            self.url, {'count': 'none', 'page_size': 2, 'page': 2})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+        # The last page cannot be located without an exact count
+        response = self.client.get(self.url, {'count': 'none', 'page': 'last'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached_count(self):
+        """Test that cached counts skip the COUNT query on repeat requests"""
+        params = {'count': 'cached', 'department': 'it', 'display': 'email'}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['count_strategy'], 'cached')
+
+        # Same filters in another order with a different display and page
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {
+                'display': 'first_name', 'department': 'it',
+                'count': 'cached', 'page_size': 1, 'status': 'null'})
+        self.assertEqual(response.data['count'], 2)
+
+    def test_response_cache(self):
+        """Test that repeated queries are served from the response cache"""
+        params = {'department': 'it', 'status': 'active', 'display': 'first_name,email'}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        # Same query in another order with an ignored null filter
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, {
+                'display': 'first_name,email', 'status': 'active',
+                'location': 'null', 'department': 'it'})
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.json(), response.json())
+
+        # Any write to contact data expires the entry
+        first_name = ContactProperty.objects.get(
+            contact=self.contact1, property=self.first_name_prop)
+        first_name.singleline_value = 'Johnny'
+        first_name.save()
+        response = self.client.get(self.url, params)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Johnny', [
+            contact['first_name'] for contact in response.data['results']])
+
+    def test_caches_expire_after_write_in_other_process(self):
+        """Test that cached lists and facets expire on writes made elsewhere"""
+        params = {'department': 'it', 'display': 'first_name'}
+        facets_url = reverse('contacts:contact-facets')
+        self.client.get(self.url, params)
+        self.client.get(facets_url, params)
+        self.assertEqual(self.client.get(self.url, params)['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(facets_url, params)['X-Cache'], 'HIT')
+
+        # A write by another process: no signal fires in this one
+        ContactProperty.objects.filter(
+            contact=self.contact1, property=self.first_name_prop).update(
+            singleline_value='Johnny')
+        refresh_flat_contacts([self.contact1.pk])
+        run_in_other_process(
+            'from contacts.cache import bump_data_version\nbump_data_version()')
+
+        response = self.client.get(self.url, params)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Johnny', [
+            contact['first_name'] for contact in response.data['results']])
+        self.assertEqual(self.client.get(facets_url, params)['X-Cache'], 'MISS')
+
+    def test_response_cache_pagination_and_host(self):
+        """Test that cursor mode and other hosts never get a cached page-number body"""
+        self.client.get(self.url, {'page_size': 1})
+
+        response = self.client.get(self.url, {'cursor': '', 'page_size': 1})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotIn('count', response.data)
+
+        # Absolute links in the cached body belong to the host that got them
+        with self.settings(ALLOWED_HOSTS=['testserver', 'b.example']):
+            response = self.client.get(self.url, {'page_size': 1}, HTTP_HOST='b.example')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertTrue(response.data['next'].startswith('http://b.example/'))
+
+    @override_settings(CONTACTS_RESPONSE_CACHE_TIMEOUT=0)
+    def test_response_cache_disabled(self):
+        """Test that a zero timeout disables the response cache"""
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertNotIn('X-Cache', response)
+
+    def test_conditional_get(self):
+        """Test that unchanged listings are revalidated with 304 responses"""
+        params = {'department': 'it', 'display': 'first_name'}
+        response = self.client.get(self.url, params)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(
+            self.url, params, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Another query has another ETag
+        response = self.client.get(
+            self.url, {'department': 'hr'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            reverse('contacts:contact-list-async'), params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Cursor mode has another body, so another ETag
+        response = self.client.get(
+            self.url, dict(params, cursor=''), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Any write changes the ETag
+        self.contact1.save()
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_conditional_get_after_write_in_other_process(self):
+        """Test that a write made by another process changes the ETag"""
+        params = {'department': 'it'}
+        etag = self.client.get(self.url, params)['ETag']
+
+        run_in_other_process(
+            'from contacts.cache import bump_data_version\nbump_data_version()')
+
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_export_ndjson(self):
+        """Test that the export streams one JSON object per filtered contact"""
+        response = self.client.get(reverse('contacts:contact-export'), {
+            'department': 'it', 'display': 'first_name,department'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            sorted(row['first_name'] for row in rows), ['Bob', 'John'])
+        self.assertEqual(
+            set(rows[0]), {'id', 'created_at', 'updated_at', 'first_name', 'department'})
+        self.assertEqual(rows[0]['department']['code'], 'it')
+
+    def test_export_ordering(self):
+        """Test that the export follows `ordering`, by creation date otherwise"""
+        def first_names(params):
+            response = self.client.get(
+                reverse('contacts:contact-export'), dict(params, display='first_name'))
+            lines = b''.join(response.streaming_content).decode().splitlines()
+            return [json.loads(line)['first_name'] for line in lines]
+
+        self.assertEqual(first_names({}), ['John', 'Jane', 'Bob'])
+        self.assertEqual(first_names({'ordering': 'last_name'}), ['John', 'Jane', 'Bob'])
+        self.assertEqual(first_names({'ordering': '-last_name'}), ['Bob', 'Jane', 'John'])
+        self.assertEqual(first_names({'ordering': 'bogus'}), ['John', 'Jane', 'Bob'])
+
+    async def test_export_streams_under_asgi(self):
+        """Test that ASGI exports fetch and send rows a chunk at a time"""
+        rendered = []
+        serializer_class = ContactExportAPIView().get_serializer_class()
+        to_representation = serializer_class.to_representation
+
+        def record(serializer, contact):
+            rendered.append(contact.pk)
+            return to_representation(serializer, contact)
+
+        with mock.patch.object(ContactExportAPIView, 'chunk_size', 1), \
+                mock.patch.object(serializer_class, 'to_representation', record):
+            response = await self.async_client.get(
+                reverse('contacts:contact-export'), {'display': 'first_name'})
+            self.assertTrue(response.is_async)
+
+            content = response.__aiter__()
+            lines = [await anext(content)]
+            self.assertEqual(len(rendered), 1)
+            lines += [line async for line in content]
+
+        self.assertEqual(len(lines), await Contact.objects.acount())
+        self.assertEqual(len(rendered), len(lines))
+
+    def test_export_csv(self):
+        """Test that the export writes a header and option labels as CSV"""
+        response = self.client.get(reverse('contacts:contact-export'), {
+            'format': 'csv', 'department': 'hr', 'display': 'last_name,status'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(
+            rows[0], ['id', 'created_at', 'updated_at', 'last_name', 'status'])
+        self.assertEqual([row[3:] for row in rows[1:]], [['Smith', 'Active']])
+
+    def test_facets(self):
+        """Test that facets count filtered contacts per option in one query"""
+        url = reverse('contacts:contact-facets')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'facets': 'department,status'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['department'], [
+            {'code': 'hr', 'value': 'HR Department', 'id': str(self.hr_option.id), 'count': 1},
+            {'code': 'it', 'value': 'IT Department', 'id': str(self.it_option.id), 'count': 2},
+        ])
+
+        response = self.client.get(url, {'status': 'inactive'})
+        counts = {
+            slug: {option['code']: option['count'] for option in options}
+            for slug, options in response.data.items()
+        }
+        self.assertEqual(counts, {
+            'department': {'hr': 0, 'it': 1},
+            'status': {'active': 0, 'inactive': 1},
+        })
+
+        # Cached per filter signature until the data changes
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'status': 'inactive'})
+        self.assertEqual((response['X-Cache'], len(queries)), ('HIT', 0))
+        ContactProperty.objects.filter(
+            contact=self.contact1, property=self.status_prop).first().delete()
+        response = self.client.get(url, {'status': 'inactive'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        response = self.client.get(url, {'facets': 'department,first_name'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('first_name', response.data['facets'])
+
+    def test_async_list_matches_sync(self):
+        """Test that the async list view returns the same responses"""
+        sync_url = self.url
+        async_url = reverse('contacts:contact-list-async')
+        queries = [
+            {},
+            {'department': 'it', 'display': 'first_name,email,department'},
+            {'search': 'john', 'display': 'first_name'},
+            {'page_size': 2, 'page': 2, 'count': 'none'},
+            {'page_size': 2, 'count': 'cached', 'status': 'active'},
+            {'ordering': '-last_name', 'page_size': 2, 'page': 2},
+            {'cursor': '', 'page_size': 2},
+            {'page': 5},
+            {'cursor': 'not-a-cursor'},
+        ]
+        for params in queries:
+            with self.subTest(params=params):
+                expected = self.client.get(sync_url, params)
+                response = self.client.get(async_url, params)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response['Content-Type'], expected['Content-Type'])
+                content = response.content.decode().replace(async_url, sync_url)
+                self.assertEqual(json.loads(content), expected.json())
+
+        # Follow the cursor links of the async view
+        response = self.client.get(async_url, {'cursor': '', 'page_size': 2})
+        response = self.client.get(response.json()['next'])
+        self.assertEqual(len(response.json()['results']), 1)
+
     def test_null_parameter_handling(self):
         """Test handling of null parameters"""
         response = self.client.get(self.url, {
@@ -421,6 +836,97 @@ class ContactListAPIViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['count'], 1)
 
+    def test_filter_operators(self):
+        """Test the exact, startswith, in and isnull filter operators"""
+        cases = [
+            ({'email__exact': 'john.doe@company.com'}, 1),
+            ({'email__exact': 'JOHN.DOE@company.com'}, 0),
+            ({'email__exact': 'john'}, 0),
+            ({'first_name__startswith': 'J'}, 2),
+            ({'last_name__startswith': 'Sm'}, 1),
+            ({'last_name__startswith': 'sm'}, 0),
+            ({'first_name__in': 'John, Bob'}, 2),
+            ({'department__exact': 'it'}, 2),
+            ({'department__exact': 'IT Department'}, 0),
+            ({'department__in': 'it,hr'}, 3),
+            ({'status__in': 'inactive,unknown'}, 1),
+            ({'notes__isnull': 'true'}, 2),
+            ({'notes__isnull': 'false'}, 1),
+            ({'status__isnull': 'true', 'department__in': 'it'}, 0),
+            ({'notes__isnull': 'maybe'}, 3),
+            ({'email__unknown': 'x'}, 3),
+        ]
+        for params, count in cases:
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data['count'], count)
+
+    def test_filter_operators_avoid_like(self):
+        """Test that exact, prefix and IN filters compile to sargable predicates"""
+        for params in ({'email__exact': 'john.doe@company.com'},
+                       {'last_name__startswith': 'Sm'},
+                       {'first_name__in': 'John,Bob'}):
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(self.url, dict(params, count='none'))
+                self.assertFalse(
+                    any('LIKE' in query['sql'] for query in queries.captured_queries))
+
+    def test_ordering(self):
+        """Test ordering by property values, option order and timestamps"""
+        def first_names(params):
+            response = self.client.get(self.url, dict(params, display='first_name'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [contact['first_name'] for contact in response.data['results']]
+
+        self.assertEqual(first_names({'ordering': 'last_name'}), ['John', 'Jane', 'Bob'])
+        self.assertEqual(first_names({'ordering': '-last_name'}), ['Bob', 'Jane', 'John'])
+        self.assertEqual(first_names({'ordering': '-created_at'}), ['Bob', 'Jane', 'John'])
+        self.assertEqual(
+            first_names({'ordering': 'last_name', 'department': 'it'}), ['John', 'Bob'])
+
+        # Contacts without a value come last in both directions
+        self.assertEqual(first_names({'ordering': 'notes'})[0], 'John')
+        self.assertEqual(first_names({'ordering': '-notes'})[0], 'John')
+
+        # Options sort by Option.order, then by the next key
+        self.active_option.order = 1
+        self.active_option.save()
+        self.assertEqual(
+            first_names({'ordering': 'status,first_name'}), ['Bob', 'Jane', 'John'])
+        self.assertEqual(
+            first_names({'ordering': '-status,-first_name'}), ['John', 'Jane', 'Bob'])
+
+        # Unknown names are ignored
+        self.assertEqual(len(first_names({'ordering': 'bogus,-'})), 3)
+
+    def test_default_ordering(self):
+        """Test that listings without `ordering` are paged by creation date"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            pages = [
+                self.client.get(
+                    self.url, {'page_size': 2, 'page': page, 'display': 'first_name'})
+                for page in (1, 2)
+            ]
+        self.assertEqual(
+            [contact['first_name'] for page in pages for contact in page.data['results']],
+            ['John', 'Jane', 'Bob'])
+
+    def test_ordering_across_pages(self):
+        """Test that ordered pages follow each other for every count strategy"""
+        for count in ('exact', 'none'):
+            with self.subTest(count=count):
+                pages = [
+                    self.client.get(self.url, {
+                        'ordering': '-last_name', 'page_size': 1, 'page': page,
+                        'count': count, 'display': 'last_name'
+                    }).data['results'][0]['last_name']
+                    for page in (1, 2, 3)
+                ]
+                self.assertEqual(pages, ['Wilson', 'Smith', 'Doe'])
+
     def test_option_property_serialization(self):
         """Test that option properties are properly serialized"""
         response = self.client.get(
@@ -449,8 +955,933 @@ class ContactListAPIViewTest(APITestCase):
         # Should be limited to max_page_size of 100, but since we only have 3 contacts
         self.assertEqual(len(response.data['results']), 3)
 
+    def test_query_count_independent_of_page_size(self):
+        """Test that serialization reuses the prefetched property rows"""
+        # Warm the property registry
+        property_registry.get('first_name')
+
+        # COUNT, contact page and one prefetch of all their properties
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                self.url, {'page_size': 1, 'display': 'first_name'})
+        self.assertEqual(len(response.data['results']), 1)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+
+        contacts = {item['id']: item for item in response.data['results']}
+        contact = contacts[str(self.contact1.id)]
+        self.assertEqual(contact['first_name'], 'John')
+        self.assertEqual(contact['department']['code'], 'it')
+        self.assertEqual(contact['notes'], 'Senior developer with 5 years experience')
+        self.assertIsNone(contacts[str(self.contact2.id)]['notes'])
+
+    def test_display_limits_prefetch(self):
+        """Test that only displayed properties and read columns are fetched"""
+        property_registry.get('first_name')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'display': 'email,status'})
+        contacts = {item['id']: item for item in response.data['results']}
+        self.assertEqual(contacts[str(self.contact1.id)]['email'], 'john.doe@company.com')
+        self.assertEqual(contacts[str(self.contact3.id)]['status']['code'], 'inactive')
+
+        prefetch = queries.captured_queries[-1]['sql']
+        self.assertIn(self.email_prop.id.hex, prefetch)
+        self.assertIn(self.status_prop.id.hex, prefetch)
+        self.assertNotIn(self.first_name_prop.id.hex, prefetch)
+        for query in queries.captured_queries:
+            self.assertNotIn('changed_by_id', query['sql'])
+            self.assertNotIn('JOIN', query['sql'])
+
     def test_response_headers(self):
         """Test that appropriate headers are set"""
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class FastJSONRendererTest(TestCase):
+    """Unit tests for the orjson-backed DRF renderer"""
+
+    def test_output_matches_json_renderer(self):
+        """Test that native values render exactly like JSONRenderer"""
+        data = {
+            'id': uuid.UUID('123e4567-e89b-12d3-a456-426614174000'),
+            'created_at': datetime(2024, 1, 15, 10, 30, 0, 123456, tzinfo=dt_timezone.utc),
+            'updated_at': datetime(2024, 1, 15, 10, 30, tzinfo=dt_timezone(timedelta(hours=7))),
+            'birthday': date(1990, 5, 17),
+            'salary': Decimal('1234.50'),
+            'name': 'Nguyễn Văn A \u2028 "quoted"',
+            'department': {'code': 'it', 'value': 'IT', 'id': uuid.uuid4()},
+            'tags': ('a', 'b'),
+            'big': 2 ** 70,
+            'empty': None,
+        }
+        for payload in (data, [data, data], {1: 'int key'}):
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_indent_falls_back_to_json_renderer(self):
+        """Test that indented output is left to the stdlib renderer"""
+        context = {'indent': 4}
+        self.assertEqual(
+            FastJSONRenderer().render({'a': [1]}, 'application/json', context),
+            JSONRenderer().render({'a': [1]}, 'application/json', context))
+
+    def test_registered_as_default_renderer(self):
+        """Test that API responses go through the fast renderer"""
+        response = self.client.get(reverse('contacts:contact-list'))
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+
+
+class PropertyRegistryTest(TestCase):
+    """Unit tests for the in-memory property registry"""
+
+    def setUp(self):
+        self.department_prop = Property.objects.create(
+            name='Department',
+            slug='department',
+            type='option'
+        )
+        self.it_option = Option.objects.create(
+            property=self.department_prop,
+            code='it',
+            value='IT Department'
+        )
+
+    def test_lookups_after_load_run_no_queries(self):
+        """Test that warm registry lookups never hit the database"""
+        property_registry.get('department')
+
+        with self.assertNumQueries(0):
+            property_meta = property_registry.get('department')
+            self.assertEqual(property_meta.id, self.department_prop.id)
+            self.assertEqual(property_meta.get_option('it').id, self.it_option.id)
+            self.assertIsNone(property_registry.get('missing'))
+            self.assertEqual(
+                [prop.slug for prop in property_registry.resolve_display('')],
+                ['department'])
+
+    def test_signals_invalidate_registry(self):
+        """Test that schema changes are visible on the next lookup"""
+        self.assertIsNone(property_registry.get('email'))
+
+        Property.objects.create(name='Email', slug='email', type='singleline')
+        self.assertEqual(property_registry.get('email').type, 'singleline')
+
+        Option.objects.create(
+            property=self.department_prop, code='hr', value='HR Department')
+        self.assertEqual(
+            property_registry.get('department').get_option('hr').value,
+            'HR Department')
+
+        self.it_option.delete()
+        self.assertIsNone(property_registry.get('department').get_option('it'))
+
+    def test_invalidate_during_lookup(self):
+        """Test that an invalidation racing a lookup never leaves it without data"""
+        property_registry.get('department')
+        load = property_registry._load
+
+        def load_then_invalidate(version):
+            load(version)
+            property_registry.invalidate()
+
+        with mock.patch.object(property_registry, '_load', side_effect=load_then_invalidate):
+            property_registry.invalidate()
+            self.assertEqual(property_registry.get('department').id, self.department_prop.id)
+
+        # The invalidation is not lost: the next lookup reloads
+        with self.assertNumQueries(2):
+            self.assertEqual(property_registry.get('department').id, self.department_prop.id)
+
+    def test_invalidate_in_other_process(self):
+        """Test that a schema change made by another process is picked up"""
+        property_registry.get('department')
+
+        # A write by another process: no signal fires in this one
+        Property.objects.filter(pk=self.department_prop.pk).update(name='Team')
+        run_in_other_process(
+            'from contacts.registry import property_registry\n'
+            'property_registry.invalidate()')
+
+        with mock.patch.object(property_registry, 'version_check_interval', 0):
+            self.assertEqual(property_registry.get('department').name, 'Team')
+
+
+@override_settings(CONTACTS_USE_READ_MODEL=True)
+class FlatContactListAPIViewTest(ContactListAPIViewTest):
+    """Run the contact list tests against the FlatContact read model"""
+
+    def test_query_count_independent_of_page_size(self):
+        """Test that listing reads only the read model table"""
+        property_registry.get('first_name')
+
+        # COUNT and contact page, no prefetch
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.url, {'page_size': 1, 'display': 'first_name'})
+        self.assertEqual(len(response.data['results']), 1)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+
+        contacts = {item['id']: item for item in response.data['results']}
+        contact = contacts[str(self.contact1.id)]
+        self.assertEqual(contact['first_name'], 'John')
+        self.assertEqual(contact['department']['code'], 'it')
+        self.assertEqual(contact['notes'], 'Senior developer with 5 years experience')
+        self.assertIsNone(contacts[str(self.contact2.id)]['notes'])
+
+    def test_display_limits_prefetch(self):
+        """Test that only the columns the serializer reads are fetched"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'display': 'email,status'})
+        self.assertEqual(len(response.data['results']), 3)
+        for query in queries.captured_queries:
+            self.assertNotIn('refreshed_at', query['sql'])
+
+    def test_cached_count(self):
+        """Test that cached counts skip the COUNT query on repeat requests"""
+        params = {'count': 'cached', 'status': 'inactive'}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.data['count'], 1)
+
+        # Another page size misses the response cache but not the count
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, dict(params, page_size=1))
+        self.assertEqual(response.data['count'], 1)
+
+    def test_read_model_follows_writes(self):
+        """Test that the read model is kept in sync with the EAV tables"""
+        self.assertEqual(
+            FlatContact.objects.get(contact=self.contact1).values['first_name'],
+            'John')
+
+        ContactProperty.objects.filter(
+            contact=self.contact1, property=self.first_name_prop).get().delete()
+        self.assertNotIn(
+            'first_name', FlatContact.objects.get(contact=self.contact1).values)
+
+        self.it_option.value = 'Information Technology'
+        self.it_option.save()
+        response = self.client.get(self.url, {'department': 'information'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            response.data['results'][0]['department']['value'],
+            'Information Technology')
+
+        self.contact2.delete()
+        self.assertFalse(FlatContact.objects.filter(pk=self.contact2.pk).exists())
+
+    def test_schema_delete_refreshes_in_one_batch(self):
+        """Test that deleting an option or property refreshes its contacts at once"""
+        for _ in range(20):
+            contact = Contact.objects.create()
+            ContactProperty.objects.create(
+                contact=contact, property=self.department_prop,
+                singleoption_value=self.it_option)
+
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.it_option.delete()
+        self.assertLess(len(queries), 15)
+        self.assertNotIn(
+            'department', FlatContact.objects.get(contact=self.contact1).values)
+        self.assertEqual(
+            FlatContact.objects.get(contact=self.contact2).values['department']['code'], 'hr')
+
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.status_prop.delete()
+        self.assertLess(len(queries), 15)
+        self.assertFalse(FlatContact.objects.filter(values__has_key='status').exists())
+
+    def test_rebuild_command(self):
+        """Test that the management command rebuilds every contact"""
+        FlatContact.objects.all().delete()
+
+        call_command('rebuild_flat_contacts', stdout=StringIO())
+
+        self.assertEqual(FlatContact.objects.count(), 3)
+        flat = FlatContact.objects.get(contact=self.contact3)
+        self.assertEqual(flat.values['last_name'], 'Wilson')
+        self.assertEqual(flat.values['status']['code'], 'inactive')
+
+
+class ContactWriteFixtureMixin:
+    """
+    Text, textarea and option properties, and one contact with a first name
+    and a department, for the contact write endpoints
+    """
+
+    def setUp(self):
+        rate_limit_data.clear()
+        self.first_name_prop = Property.objects.create(
+            name='First Name', slug='first_name', type='singleline')
+        self.notes_prop = Property.objects.create(
+            name='Notes', slug='notes', type='textarea')
+        self.department_prop = Property.objects.create(
+            name='Department', slug='department', type='option')
+        self.it_option = Option.objects.create(
+            property=self.department_prop, code='it', value='IT Department')
+        self.hr_option = Option.objects.create(
+            property=self.department_prop, code='hr', value='HR Department')
+
+        self.contact = Contact.objects.create()
+        ContactProperty.objects.create(
+            contact=self.contact, property=self.first_name_prop, singleline_value='John')
+        ContactProperty.objects.create(
+            contact=self.contact, property=self.department_prop,
+            singleoption_value=self.it_option)
+
+
+@strict_queries
+class ContactBulkUpsertAPIViewTest(ContactWriteFixtureMixin, APITestCase):
+    """Unit tests for the bulk contact upsert endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='importer', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('contacts:contact-bulk')
+
+    def test_create_and_update(self):
+        """Test that rows create new contacts and update existing ones"""
+        response = self.client.post(self.url, [
+            {'first_name': 'Jane', 'notes': 'New hire', 'department': 'hr'},
+            {'id': str(self.contact.id), 'first_name': 'Johnny',
+             'department': {'code': 'hr', 'value': 'HR Department'}},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data['created'], response.data['updated'], response.data['errors']),
+            (1, 1, 0))
+        created, updated = response.data['results']
+        self.assertEqual(created['status'], 'created')
+        self.assertEqual(updated, {
+            'index': 1, 'id': str(self.contact.id), 'status': 'updated'})
+
+        jane = ContactProperty.objects.get(
+            contact_id=created['id'], property=self.first_name_prop)
+        self.assertEqual(jane.singleline_value, 'Jane')
+        self.assertEqual(jane.created_by, self.user)
+        self.assertEqual(
+            ContactProperty.objects.get(
+                contact=self.contact, property=self.first_name_prop).singleline_value,
+            'Johnny')
+        self.assertEqual(
+            ContactProperty.objects.filter(contact=self.contact).count(), 2)
+
+        # The read model and the list follow
+        self.assertEqual(
+            FlatContact.objects.get(contact=self.contact).values['department']['code'], 'hr')
+        response = self.client.get(reverse('contacts:contact-list'), {'department': 'hr'})
+        self.assertEqual(response.data['count'], 2)
+
+    def test_null_clears_values(self):
+        """Test that a null value deletes the row and never inserts an empty one"""
+        response = self.client.post(self.url, [
+            {'id': str(self.contact.id), 'first_name': None, 'notes': None},
+            {'first_name': None, 'department': 'hr'},
+        ], format='json')
+        self.assertEqual(response.data['errors'], 0)
+        created_id = response.data['results'][1]['id']
+
+        self.assertEqual(
+            list(ContactProperty.objects.filter(
+                contact=self.contact).values_list('property__slug', flat=True)),
+            ['department'])
+        self.assertEqual(
+            list(ContactProperty.objects.filter(
+                contact_id=created_id).values_list('property__slug', flat=True)),
+            ['department'])
+        self.assertNotIn(
+            'first_name', FlatContact.objects.get(contact=self.contact).values)
+
+    def test_ndjson_body(self):
+        """Test that contacts can be sent as newline-delimited JSON"""
+        body = '{"first_name": "Ann"}\n\n{"first_name": "Bob", "department": "it"}\n'
+        response = self.client.post(
+            self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+
+        response = self.client.post(
+            self.url, '{"first_name": "Ann"}\n{oops', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', response.data['detail'])
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        """Test that invalid rows get errors while valid rows are written"""
+        response = self.client.post(self.url, [
+            {'first_name': 'Valid'},
+            {'first_name': 'X', 'unknown': 'value'},
+            {'department': 'sales'},
+            {'id': 'not-a-uuid', 'first_name': 'Y'},
+            {'first_name': 42},
+            'not an object',
+            {'id': str(self.contact.id), 'first_name': 'First'},
+            {'id': str(self.contact.id), 'first_name': 'Second'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['created', 'error', 'error', 'error', 'error', 'error', 'updated', 'error'])
+        self.assertEqual(results[1]['errors'], {'unknown': ['Unknown property.']})
+        self.assertEqual(
+            results[2]['errors'], {'department': ['Unknown option code "sales".']})
+        self.assertIn('id', results[3]['errors'])
+        self.assertEqual(results[4]['errors'], {'first_name': ['Expected a string.']})
+        self.assertIn('non_field_errors', results[5]['errors'])
+        self.assertIn('id', results[7]['errors'])
+        self.assertEqual(
+            ContactProperty.objects.get(
+                contact=self.contact, property=self.first_name_prop).singleline_value,
+            'First')
+        self.assertFalse(ContactProperty.objects.filter(singleline_value='X').exists())
+
+    def test_query_count_independent_of_row_count(self):
+        """Test that a chunk is written with a fixed number of queries"""
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(
+                self.url, [{'first_name': f'C{i}'} for i in range(2)], format='json')
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(
+                self.url, [{'first_name': f'C{i}'} for i in range(40)], format='json')
+        self.assertEqual(len(many), len(few))
+
+    def test_body_must_be_a_list(self):
+        """Test that a single object is rejected"""
+        response = self.client.post(self.url, {'first_name': 'John'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        """Test that anonymous clients cannot write contacts"""
+        self.client.force_authenticate(None)
+        response = self.client.post(self.url, [{'first_name': 'Eve'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@strict_queries
+class ContactDetailAPIViewTest(ContactWriteFixtureMixin, APITestCase):
+    """Unit tests for the contact detail endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='editor', password='testpass123')
+        self.url = reverse('contacts:contact-detail', args=[self.contact.id])
+
+    def test_retrieve_in_two_queries(self):
+        """Test that the contact and all its properties are fetched in two queries"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 2)
+
+        self.assertEqual(response.data['id'], str(self.contact.id))
+        self.assertEqual(response.data['properties'], [
+            {'property_name': 'Department', 'property_slug': 'department',
+             'property_type': 'option',
+             'value': {'code': 'it', 'value': 'IT Department', 'id': str(self.it_option.id)}},
+            {'property_name': 'First Name', 'property_slug': 'first_name',
+             'property_type': 'singleline', 'value': 'John'},
+        ])
+
+    def test_retrieve_unknown_contact(self):
+        """Test that an unknown id returns 404"""
+        response = self.client.get(reverse('contacts:contact-detail', args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_patch_writes_only_changed_rows(self):
+        """Test that PATCH updates changed rows, inserts new ones and skips the rest"""
+        self.client.force_authenticate(self.user)
+        unchanged = ContactProperty.objects.get(
+            contact=self.contact, property=self.first_name_prop)
+
+        response = self.client.patch(self.url, {
+            'first_name': 'John', 'department': 'hr', 'notes': 'Transferred'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        values = {item['property_slug']: item['value'] for item in response.data['properties']}
+        self.assertEqual(values['department']['code'], 'hr')
+        self.assertEqual(values['notes'], 'Transferred')
+
+        department = ContactProperty.objects.get(
+            contact=self.contact, property=self.department_prop)
+        self.assertEqual(department.singleoption_value, self.hr_option)
+        self.assertEqual(department.changed_by, self.user)
+        self.assertEqual(
+            ContactProperty.objects.get(pk=unchanged.pk).updated_at, unchanged.updated_at)
+
+        # The read model and the list follow
+        self.assertEqual(
+            FlatContact.objects.get(contact=self.contact).values['notes'], 'Transferred')
+        response = self.client.get(reverse('contacts:contact-list'), {'department': 'hr'})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_patch_null_clears_values(self):
+        """Test that null deletes a value and is a no-op for a property without one"""
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(
+            self.url, {'first_name': None, 'notes': None}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['property_slug'] for item in response.data['properties']], ['department'])
+        self.assertEqual(ContactProperty.objects.filter(contact=self.contact).count(), 1)
+        self.assertNotIn(
+            'first_name', FlatContact.objects.get(contact=self.contact).values)
+
+    def test_patch_query_count_independent_of_property_count(self):
+        """Test that changing more properties adds no round trips"""
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as one:
+            self.client.patch(self.url, {'department': 'hr'}, format='json')
+        with CaptureQueriesContext(connection) as two:
+            self.client.patch(self.url, {'first_name': 'Jim', 'department': 'it'}, format='json')
+        self.assertEqual(len(two), len(one))
+
+    def test_patch_invalid_values(self):
+        """Test that invalid values are rejected without writing anything"""
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(
+            self.url, {'first_name': 'Jim', 'department': 'sales'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'department': ['Unknown option code "sales".']})
+        self.assertEqual(
+            ContactProperty.objects.get(
+                contact=self.contact, property=self.first_name_prop).singleline_value,
+            'John')
+
+    def test_patch_requires_authentication(self):
+        """Test that anonymous clients can read but not write"""
+        response = self.client.patch(self.url, {'first_name': 'Eve'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(QUERY_ACCOUNTING_HEADERS=True)
+class QueryAccountingMiddlewareTest(TestCase):
+    """Unit tests for per-request SQL accounting"""
+
+    def setUp(self):
+        self.request = RequestFactory().get('/api/v1/contacts/')
+
+    def run_queries(self, count):
+        def view(request):
+            for _ in range(count):
+                list(Property.objects.filter(slug__in=['a', 'b'][:count % 2 + 1]))
+            return HttpResponse()
+        return QueryAccountingMiddleware(view)(self.request)
+
+    def test_headers(self):
+        """Test that query count and time are reported"""
+        response = self.run_queries(3)
+        self.assertEqual(response['X-DB-Queries'], '3')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="3 queries"$')
+        self.assertEqual(self.request.query_stats.count, 3)
+
+    @override_settings(QUERY_ACCOUNTING_HEADERS=False)
+    def test_headers_disabled(self):
+        """Test that queries are counted but not reported without QUERY_ACCOUNTING_HEADERS"""
+        response = self.run_queries(3)
+        self.assertFalse(response.has_header('X-DB-Queries'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(self.request.query_stats.count, 3)
+
+    async def test_async_headers(self):
+        """Test that queries of async views and their sync calls are counted"""
+        async def view(request):
+            await Property.objects.filter(slug='a').acount()
+            await sync_to_async(list)(Property.objects.all())
+            return HttpResponse()
+
+        middleware = QueryAccountingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(self.request)
+        self.assertEqual(response['X-DB-Queries'], '2')
+        self.assertEqual(self.request.query_stats.count, 2)
+
+    def test_fingerprint_collapses_parameter_lists(self):
+        """Test that IN lists of any length share a fingerprint"""
+        self.assertEqual(
+            query_fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s)\n AND x = %s'),
+            query_fingerprint('SELECT 1 FROM t WHERE id IN (%s) AND x = %s'))
+
+    @override_settings(QUERY_ACCOUNTING_MAX_REPEATS=3)
+    def test_repeated_queries(self):
+        """Test that a repeated query is logged, or raised in strict mode"""
+        self.run_queries(3)
+
+        with self.assertLogs('config.middleware', 'ERROR') as logs:
+            self.run_queries(4)
+        self.assertIn('4x SELECT', logs.output[0])
+
+        with override_settings(QUERY_ACCOUNTING_STRICT=True):
+            with self.assertRaises(RepeatedQueryError):
+                self.run_queries(4)
+
+
+class RateLimitMiddlewareTest(TestCase):
+    """Unit tests for the sliding window rate limiter"""
+
+    def setUp(self):
+        rate_limit_data.clear()
+        self.middleware = APIRateLimitMiddleware(lambda request: HttpResponse())
+        self.limiter = SlidingWindowRateLimiter(
+            max_requests=10, time_window=100, store=InMemoryRateLimitStore())
+
+    def test_limit_and_headers(self):
+        """Test that the limit is enforced and headers come from one decision"""
+        limiter = self.middleware.get_rate_limiter('/api/v1/contacts/facets/')
+        self.assertEqual(limiter.name, '/api/v1/contacts/')
+        limiter.max_requests = 2
+
+        factory = RequestFactory()
+        for remaining in ('1', '0'):
+            response = self.middleware(factory.get('/api/v1/contacts/'))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-RateLimit-Remaining'], remaining)
+            self.assertEqual(response['X-RateLimit-Limit'], '2')
+
+        request = factory.get('/api/v1/contacts/')
+        response = self.middleware(request)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(request.rate_limit.allowed)
+        self.assertEqual(response['Retry-After'], str(request.rate_limit.retry_after))
+        self.assertEqual(response['X-RateLimit-Reset'], str(request.rate_limit.reset))
+        # Other prefixes keep their own budget
+        self.assertEqual(self.middleware(factory.get('/api/token/')).status_code, 200)
+        # One counter update per request
+        self.assertEqual(len(rate_limit_data), 2)
+
+    def test_async_chain(self):
+        """Test that under ASGI requests are checked on the event loop"""
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = APIRateLimitMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        middleware.get_rate_limiter('/api/').max_requests = 1
+
+        async def run():
+            factory = RequestFactory()
+            return [await middleware(factory.get('/api/token/')) for _ in range(2)]
+
+        with mock.patch('config.ratelimit.sync_to_async', side_effect=AssertionError):
+            responses = asyncio.run(run())
+        self.assertEqual([response.status_code for response in responses], [200, 429])
+        self.assertEqual(responses[1]['X-RateLimit-Remaining'], '0')
+
+    @override_settings(QUERY_ACCOUNTING_HEADERS=True)
+    async def test_asgi_middleware_chain(self):
+        """Test that the configured chain keeps the limiter on the event loop"""
+        handler = ASGIHandler()
+        handler.load_middleware(is_async=True)
+        # Each middleware is wrapped by convert_exception_to_response
+        middleware = handler._middleware_chain.__wrapped__
+        self.assertIsInstance(middleware, APIRateLimitMiddleware)
+        self.assertTrue(middleware.async_mode)
+        self.assertTrue(middleware.get_response.__wrapped__.async_mode)
+
+        with mock.patch('config.ratelimit.sync_to_async', side_effect=AssertionError):
+            response = await self.async_client.get(reverse('contacts:contact-list-async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-RateLimit-Remaining'], '99')
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+
+    def test_prefix_router(self):
+        """Test that the longest matching prefix wins"""
+        router = PrefixRouter({'/api/': 'api', '/api/v1/contacts/': 'contacts', '/a.': 'dot'})
+        self.assertEqual(router.match('/api/v1/contacts/facets/'), 'contacts')
+        self.assertEqual(router.match('/api/v1/users/'), 'api')
+        self.assertIsNone(router.match('/ab'))
+        self.assertIsNone(router.match('/static/api/'))
+        self.assertIsNone(PrefixRouter({}).match('/api/'))
+
+    def test_request_cost(self):
+        """Test that larger pages, filters and search cost more"""
+        cost = RequestCost(ignored_params=('page', 'display'))
+        factory = RequestFactory()
+        self.assertEqual(cost(factory.get('/', {'page_size': 1})), 1)
+        self.assertEqual(cost(factory.get('/', {'page_size': 100, 'search': 'a'})), 10)
+        self.assertEqual(cost(factory.get('/', {
+            'department': 'it', 'status': 'active', 'location': 'null',
+            'page': 2, 'display': 'email'})), 3)
+        self.assertEqual(cost(factory.get('/', {'page_size': 'x', 'search': ' '})), 1)
+
+    def test_export_and_bulk_costs(self):
+        """Test that exports and bulk writes charge the contacts budget more"""
+        factory = RequestFactory()
+        response = self.middleware(factory.get('/api/v1/contacts/export/', {'page_size': 100}))
+        self.assertEqual(response['X-RateLimit-Cost'], '20')
+        self.assertEqual(response['X-RateLimit-Remaining'], '80')
+
+        # 200 bytes per row: 1,000 rows cost 10 units more than the base
+        body = json.dumps([{'first_name': 'x' * 180}] * 1000)
+        response = self.middleware(factory.post(
+            '/api/v1/contacts/bulk/', body, content_type='application/json'))
+        self.assertEqual(response['X-RateLimit-Cost'], '20')
+        self.assertEqual(response['X-RateLimit-Remaining'], '60')
+
+        response = self.middleware(factory.post(
+            '/api/v1/contacts/bulk/', '[]', content_type='application/json'))
+        self.assertEqual(response['X-RateLimit-Cost'], '11')
+
+        # A body too large for the budget is rejected before it is read
+        response = self.middleware(factory.post(
+            '/api/v1/contacts/bulk/', body * 10, content_type='application/json'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['X-RateLimit-Cost'], '100')
+
+    def test_jwt_users_keyed_by_id(self):
+        """Test that JWT users get their own budget and pay per query cost"""
+        user = User.objects.create_user(username='limited', password='testpass123')
+        token = AccessToken.for_user(user)
+        factory = RequestFactory()
+
+        request = factory.get(
+            '/api/v1/contacts/', {'page_size': 100, 'search': 'a'},
+            HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.middleware(request)
+        self.assertEqual(response['X-RateLimit-Limit'], '300')
+        self.assertEqual(response['X-RateLimit-Cost'], '10')
+        self.assertEqual(response['X-RateLimit-Remaining'], '290')
+
+        # Anonymous clients at the same IP keep the whole IP budget
+        for authorization in ('', 'Bearer not-a-token'):
+            response = self.middleware(factory.get(
+                '/api/v1/contacts/', HTTP_AUTHORIZATION=authorization))
+            self.assertEqual(response['X-RateLimit-Limit'], '100')
+        self.assertEqual(response['X-RateLimit-Remaining'], '98')
+
+    def test_sliding_window(self):
+        """Test that the previous window counts in proportion to its overlap"""
+        for _ in range(10):
+            self.assertTrue(self.limiter.hit_key('client', now=150).allowed)
+        decision = self.limiter.hit_key('client', now=199)
+        self.assertFalse(decision.allowed)
+        self.assertEqual(decision.retry_after, 20)
+
+        # At 275, a quarter of the previous window's 11 hits still counts
+        decision = self.limiter.hit_key('client', now=275)
+        self.assertTrue(decision.allowed)
+        self.assertEqual(decision.remaining, 6)
+        self.assertEqual(decision.reset, 300)
+
+    def test_store_evicts_idle_clients(self):
+        """Test that the store stays bounded and drops expired clients"""
+        store = InMemoryRateLimitStore(max_entries=3)
+        for client in 'abcd':
+            store.hit(client, window=0, amount=1, ttl=60)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.hit('a', window=0, amount=1, ttl=60), (1, 0))
+
+        store.clear()
+        store.hit('idle', window=0, amount=1, ttl=-1)
+        store.hit('active', window=0, amount=1, ttl=60)
+        self.assertEqual(len(store), 1)
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Local stand-in for a Redis server: the commands the rate limit store sends"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RedisStandInHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+        self.writes = 0
+
+    def run(self, command, *args):
+        if command == 'INCRBY':
+            self.data[args[0]] = int(self.data.get(args[0], 0)) + int(args[1])
+            return b':%d\r\n' % self.data[args[0]]
+        if command == 'GET':
+            value = self.data.get(args[0])
+            if value is None:
+                return b'$-1\r\n'
+            value = str(value).encode()
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        if command == 'EXPIRE':
+            return b':1\r\n'
+        return b'+OK\r\n'
+
+
+class RedisStandInHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        queued = None
+        while True:
+            command = read_reply(self.rfile) if self.rfile.peek(1) else None
+            if command is None:
+                return
+            name = command[0].upper()
+            if name == 'MULTI':
+                queued = []
+                self.wfile.write(b'+OK\r\n')
+            elif name == 'EXEC':
+                with self.server.lock:
+                    self.server.writes += 1
+                    replies = [self.server.run(*queued_command) for queued_command in queued]
+                self.wfile.write(b'*%d\r\n%s' % (len(replies), b''.join(replies)))
+                queued = None
+            elif queued is not None:
+                queued.append((name, *command[1:]))
+                self.wfile.write(b'+QUEUED\r\n')
+            else:
+                with self.server.lock:
+                    self.wfile.write(self.server.run(name, *command[1:]))
+
+
+class RateLimitStoreTest(TestCase):
+    """Unit tests for the rate limit counter stores"""
+
+    def check_store(self, store):
+        self.assertEqual(store.hit('a', 10, 1, 60), (1, 0))
+        self.assertEqual(store.hit('a', 10, 2, 60), (3, 0))
+        self.assertEqual(store.hit('b', 10, 1, 60), (1, 0))
+        # The next window starts from zero and sees the previous count
+        self.assertEqual(store.hit('a', 11, 1, 60), (1, 3))
+        self.assertEqual(store.hit('a', 11, 1, 60), (2, 3))
+        # After a gap the previous window is empty
+        self.assertEqual(store.hit('a', 13, 1, 60), (1, 0))
+
+    def test_memory_store(self):
+        self.check_store(InMemoryRateLimitStore())
+
+    def test_cache_store(self):
+        """Test that processes sharing a cache share counts"""
+        self.check_store(CacheRateLimitStore(key_prefix=f'test:{uuid.uuid4()}:'))
+
+        prefix = f'test:{uuid.uuid4()}:'
+        CacheRateLimitStore(key_prefix=prefix).hit('a', 1, 5, 60)
+        self.assertEqual(CacheRateLimitStore(key_prefix=prefix).hit('a', 1, 1, 60), (6, 0))
+        self.assertEqual(CacheRateLimitStore(key_prefix=prefix).hit('a', 2, 1, 60), (1, 6))
+
+    def test_database_store(self):
+        """Test that each hit is one upsert"""
+        store = DatabaseRateLimitStore()
+        with CaptureQueriesContext(connection) as queries:
+            self.check_store(store)
+        self.assertEqual(len(queries), 6)
+
+        store = DatabaseRateLimitStore(purge_interval=0)
+        store.hit('idle', 1, 1, -1)
+        store.hit('active', 1, 1, 60)
+        self.assertEqual(list(RateLimitCounter.objects.filter(
+            client_key__in=['idle', 'active']).values_list('client_key', flat=True)), ['active'])
+
+    def test_redis_store(self):
+        """Test the Redis store against a local stand-in, one transaction per hit"""
+        server = RedisStandIn()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        host, port = server.server_address
+        store = RedisRateLimitStore(url=f'redis://{host}:{port}/0')
+        self.addCleanup(store.close)
+        self.check_store(store)
+        self.assertEqual(server.writes, 6)
+        self.assertEqual(server.data['ratelimit:a:10'], 3)
+
+        # The async path shares the counters
+        self.assertEqual(asyncio.run(store.ahit('a', 13, 2, 60)), (3, 0))
+
+    @override_settings(RATE_LIMIT_STORE='cache', RATE_LIMIT_STORE_OPTIONS={'key_prefix': 'rl:'})
+    def test_middleware_store_setting(self):
+        """Test that the middleware counts in the configured store"""
+        middleware = APIRateLimitMiddleware(lambda request: HttpResponse())
+        store = middleware.get_rate_limiter('/api/').store
+        self.assertIsInstance(store, CacheRateLimitStore)
+        self.assertEqual(store.key_prefix, 'rl:')
+
+
+class SearchBackendTest(TestCase):
+    """Unit tests for the search backends behind the search parameter"""
+
+    def setUp(self):
+        self.name_prop = Property.objects.create(
+            name='Name', slug='name', type='singleline')
+        self.notes_prop = Property.objects.create(
+            name='Notes', slug='notes', type='textarea')
+        self.team_prop = Property.objects.create(
+            name='Team', slug='team', type='option')
+        self.platform_option = Option.objects.create(
+            property=self.team_prop, code='platform', value='Platform Engineering')
+
+        self.alice = Contact.objects.create()
+        self.bob = Contact.objects.create()
+        ContactProperty.objects.create(
+            contact=self.alice, property=self.name_prop,
+            singleline_value='Alice O"Hara')
+        ContactProperty.objects.create(
+            contact=self.alice, property=self.notes_prop,
+            richtext_value='Maintains the billing service')
+        ContactProperty.objects.create(
+            contact=self.bob, property=self.team_prop,
+            singleoption_value=self.platform_option)
+
+    def search(self, backend, value):
+        return set(backend.filter(Contact.objects.all(), value))
+
+    def test_backends_return_same_matches(self):
+        """Test that the FTS index matches plain substring search"""
+        substring = SubstringSearchBackend()
+        fts = SQLiteFTSSearchBackend()
+        for value in ['alice', 'BILLING', 'engineer', 'o"h', 'ce', 'a', 'missing']:
+            self.assertEqual(
+                self.search(fts, value), self.search(substring, value), value)
+
+        self.assertEqual(self.search(fts, 'Billing Serv'), {self.alice})
+        self.assertEqual(self.search(fts, 'platform eng'), {self.bob})
+
+    def test_fts_index_follows_writes(self):
+        """Test that triggers keep the FTS index in sync"""
+        fts = SQLiteFTSSearchBackend()
+
+        self.platform_option.value = 'Infrastructure'
+        self.platform_option.save()
+        self.assertEqual(self.search(fts, 'platform'), set())
+        self.assertEqual(self.search(fts, 'infra'), {self.bob})
+
+        contact_property = ContactProperty.objects.get(
+            contact=self.alice, property=self.name_prop)
+        contact_property.singleline_value = 'Alicia'
+        contact_property.save()
+        self.assertEqual(self.search(fts, 'alicia'), {self.alice})
+
+        contact_property.delete()
+        self.assertEqual(self.search(fts, 'alicia'), set())
+
+
+class FakeContactsCommandTest(TransactionTestCase):
+    """Tests of the fake_millions_contact command"""
+
+    def setUp(self):
+        Property.objects.create(name='First Name', slug='first_name', type='singleline')
+        Property.objects.create(name='Notes', slug='notes', type='textarea')
+        department_prop = Property.objects.create(
+            name='Department', slug='department', type='option')
+        Option.objects.create(property=department_prop, code='it', value='IT Department')
+
+    def test_parallel_workers(self):
+        """Test that forked workers write every contact and its read model row"""
+        # Two shards of 10 batches or less, committed by the workers
+        call_command(
+            'fake_millions_contact', 60, '--batch-size', '5', '--workers', '2',
+            stdout=StringIO())
+
+        self.assertEqual(Contact.objects.count(), 60)
+        self.assertEqual(ContactProperty.objects.count(), 180)
+        self.assertEqual(FlatContact.objects.count(), 60)
+        for flat in FlatContact.objects.all():
+            self.assertEqual(set(flat.values), {'first_name', 'notes', 'department'})
+            self.assertEqual(flat.values['department']['code'], 'it')
+
@@ -1,8 +1,18 @@
 from django.urls import path
+from contacts.views.async_contact import AsyncContactListView
+from contacts.views.bulk import ContactBulkUpsertAPIView
 from contacts.views.contact import ContactListAPIView
+from contacts.views.detail import ContactDetailAPIView
+from contacts.views.export import ContactExportAPIView
+from contacts.views.facets import ContactFacetsAPIView
 
 app_name = 'contacts'
 
 urlpatterns = [
-    path('contacts/', ContactListAPIView.as_view(), name='contact-list')
+    path('contacts/', ContactListAPIView.as_view(), name='contact-list'),
+    path('contacts/async/', AsyncContactListView.as_view(), name='contact-list-async'),
+    path('contacts/bulk/', ContactBulkUpsertAPIView.as_view(), name='contact-bulk'),
+    path('contacts/export/', ContactExportAPIView.as_view(), name='contact-export'),
+    path('contacts/facets/', ContactFacetsAPIView.as_view(), name='contact-facets'),
+    path('contacts/<uuid:contact_id>/', ContactDetailAPIView.as_view(), name='contact-detail'),
 ]
@@ -0,0 +1,25 @@
+import hashlib
+from urllib.parse import urlencode
+
+
+def normalize_query_params(query_params, exclude=()):
+    """
+    Sorted ``(param, value)`` pairs of a query dict.
+
+    Empty values and the literal ``null`` are dropped, as the contact
+    filters ignore them, so equivalent requests normalize identically.
+    """
+    pairs = []
+    for param in query_params:
+        if param in exclude:
+            continue
+        for value in query_params.getlist(param):
+            if value and value.lower() != 'null':
+                pairs.append((param, value))
+    return sorted(pairs)
+
+
+def query_signature(query_params, exclude=()):
+    """Stable hash of the normalized query parameters"""
+    normalized = urlencode(normalize_query_params(query_params, exclude))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
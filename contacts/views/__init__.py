@@ -1 +1,6 @@
+from .async_contact import AsyncContactListView
+from .bulk import ContactBulkUpsertAPIView
 from .contact import ContactListAPIView
+from .detail import ContactDetailAPIView
+from .export import ContactExportAPIView
+from .facets import ContactFacetsAPIView
@@ -0,0 +1,89 @@
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse, OpenApiExample
+from drf_spectacular.types import OpenApiTypes
+
+from contacts.bulk import STATUS_CREATED, STATUS_ERROR, STATUS_UPDATED, upsert_contacts
+from contacts.parsers import NDJSONParser
+
+
+@extend_schema_view(
+    post=extend_schema(
+        tags=['Contacts'],
+        summary='Create or update contacts in bulk',
+        description='''
+        Upsert up to 50,000 contacts in one request, sent as a JSON array or
+        as NDJSON (`Content-Type: application/x-ndjson`, one contact per line).
+
+        Each contact is an object keyed by property slug, as returned by the
+        list and export endpoints. Options are given by code (or as the
+        `{code, value, id}` object). A contact with an `id` is updated (or
+        created with that id), one without is created. Only the properties
+        present are written; a `null` value clears the property.
+
+        Invalid rows are skipped and reported; the others are written. The
+        response has one result per input row, in order.
+        ''',
+        request={
+            'application/json': OpenApiTypes.OBJECT,
+            'application/x-ndjson': OpenApiTypes.STR,
+        },
+        examples=[
+            OpenApiExample(
+                'Create and update',
+                value=[
+                    {'first_name': 'John', 'email': 'john@company.com', 'department': 'it'},
+                    {'id': '123e4567-e89b-12d3-a456-426614174000', 'status': 'inactive'},
+                ],
+                request_only=True
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description='Per-row results',
+                examples=[
+                    OpenApiExample(
+                        'Results',
+                        value={
+                            'created': 1,
+                            'updated': 0,
+                            'errors': 1,
+                            'results': [
+                                {'index': 0, 'id': '456e7890-e89b-12d3-a456-426614174001',
+                                 'status': 'created'},
+                                {'index': 1, 'status': 'error',
+                                 'errors': {'department': ['Unknown option code "xx".']}},
+                            ]
+                        }
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description='Body is not a list of contacts'),
+        }
+    )
+)
+class ContactBulkUpsertAPIView(generics.GenericAPIView):
+    """Create or update many contacts and their property values at once"""
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+    max_rows = 50000
+
+    def post(self, request, *args, **kwargs):
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of contacts.']})
+        if len(rows) > self.max_rows:
+            raise ValidationError({'non_field_errors': [
+                f'At most {self.max_rows} contacts can be sent at once.']})
+
+        results = upsert_contacts(rows, user=request.user)
+        statuses = [result['status'] for result in results]
+        return Response({
+            'created': statuses.count(STATUS_CREATED),
+            'updated': statuses.count(STATUS_UPDATED),
+            'errors': statuses.count(STATUS_ERROR),
+            'results': results,
+        }, status=status.HTTP_200_OK)
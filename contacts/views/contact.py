@@ -1,21 +1,99 @@
 import django_filters
-from django.db.models import Q, Prefetch
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Prefetch, Q
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import generics
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
-from contacts.models import Contact, ContactProperty, Property
-from contacts.serializers.contact import ContactSerializer
+from contacts.cache import (
+    contact_list_etag, contact_list_last_modified, response_cache_key)
+from contacts.models import Contact, ContactProperty, FlatContact
+from contacts.ordering import PropertyOrderingFilter
+from contacts.pagination import ContactCursorPagination, ContactPagination
+from contacts.registry import property_registry
+from contacts.search import get_search_backend
+from contacts.serializers.contact import ContactSerializer, FlatContactSerializer
+
+
+# Operator suffixes of dynamic property filters (``email__exact=``); a
+# bare slug keeps the substring / option label match
+PROPERTY_LOOKUPS = ('exact', 'startswith', 'in', 'isnull')
+
+# Sorts after any character that can follow a prefix
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+TEXT_COLUMNS = {
+    'singleline': 'singleline_value',
+    'textarea': 'richtext_value',
+}
+
+
+def split_lookup(param):
+    """Split ``slug__lookup`` into ``(slug, lookup)``; lookup is None for a bare slug"""
+    slug, separator, lookup = param.rpartition('__')
+    if separator and lookup in PROPERTY_LOOKUPS:
+        return slug, lookup
+    return param, None
+
+
+def split_values(value):
+    """Comma-separated values of an ``__in`` filter"""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def parse_bool(value):
+    """Boolean of an ``__isnull`` filter, or None if unrecognised"""
+    value = value.lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    return None
+
+
+def match_options(property_meta, value, lookup=None):
+    """Options of an option property selected by a filter value"""
+    if lookup is None:
+        return property_meta.match_options(value)
+    if lookup == 'exact':
+        return [option for option in property_meta.options if option.code == value]
+    if lookup == 'startswith':
+        return [
+            option for option in property_meta.options if option.code.startswith(value)]
+    if lookup == 'in':
+        codes = set(split_values(value))
+        return [option for option in property_meta.options if option.code in codes]
+    return []
 
 
 class ContactFilter(django_filters.FilterSet):
-    """Dynamic filter that accepts any property slug as a filter parameter"""
+    """
+    Dynamic filter that accepts any property slug as a filter parameter.
+
+    ``slug=value`` matches text values containing ``value`` (case-insensitive)
+    and options by code or label. Operator suffixes compile to predicates the
+    (property, value) indexes can serve:
+
+    * ``slug__exact=value``: equal text value or option code
+    * ``slug__startswith=value``: text value or option code with this prefix
+      (case-sensitive)
+    * ``slug__in=a,b``: any of the comma-separated values or option codes
+    * ``slug__isnull=true|false``: contacts without / with a value
+    """
     search = django_filters.CharFilter(method='filter_search')
 
+    # Query parameters that are never treated as property filters
+    reserved_params = (
+        'search', 'page', 'page_size', 'display', 'cursor', 'count', 'format', 'facets',
+        'ordering')
+
     class Meta:
         model = Contact
         fields = ['search']
@@ -27,78 +105,229 @@ class ContactFilter(django_filters.FilterSet):
 
         # Then apply custom property filters
         for param, value in self.request.GET.items():
-            if param not in ['search', 'page', 'page_size', 'display'] and value and value.lower() != 'null':
+            if param not in self.reserved_params and value and value.lower() != 'null':
                 queryset = self._filter_by_property_slug(
                     queryset, param, value)
 
         return queryset
 
-    def _filter_by_property_slug(self, queryset, slug, value):
-        """Filter by any property slug"""
-        try:
-            property_obj = Property.objects.get(slug=slug)
-
-            if property_obj.type == 'singleline':
-                return queryset.filter(
-                    contactproperty__property=property_obj,
-                    contactproperty__singleline_value__icontains=value
-                ).distinct()
-
-            elif property_obj.type == 'textarea':
-                return queryset.filter(
-                    contactproperty__property=property_obj,
-                    contactproperty__richtext_value__icontains=value
-                ).distinct()
-
-            elif property_obj.type == 'option':
-                return queryset.filter(
-                    Q(
-                        contactproperty__property=property_obj,
-                        contactproperty__singleoption_value__code=value
-                    ) | Q(
-                        contactproperty__property=property_obj,
-                        contactproperty__singleoption_value__value__icontains=value
-                    )
-                ).distinct()
+    def _filter_by_property_slug(self, queryset, param, value):
+        """Filter by any property slug, with an optional operator suffix"""
+        slug, lookup = split_lookup(param)
+        property_meta = property_registry.get(slug)
+        if property_meta is None:
+            return queryset
 
-        except Property.DoesNotExist:
-            pass
+        if lookup == 'isnull':
+            isnull = parse_bool(value)
+            if isnull is None:
+                return queryset
+            with_value = ContactProperty.objects.filter(
+                self.has_value_predicate(property_meta),
+                property_id=property_meta.id
+            ).values('contact_id')
+            if isnull:
+                return queryset.exclude(pk__in=with_value)
+            return queryset.filter(pk__in=with_value)
 
-        return queryset
+        predicate = self.property_predicate(property_meta, value, lookup)
+        if predicate is None:
+            return queryset
+
+        # One semi-join per filter: no join fan-out, so no DISTINCT needed.
+        # "id IN (subquery)" lets the planner drive the lookup from the
+        # (property, value) indexes instead of probing contact by contact.
+        return queryset.filter(pk__in=ContactProperty.objects.filter(
+            predicate,
+            property_id=property_meta.id
+        ).values('contact_id'))
+
+    def property_predicate(self, property_meta, value, lookup=None):
+        """Condition on a ContactProperty row of the given property"""
+        if property_meta.type in TEXT_COLUMNS:
+            column = TEXT_COLUMNS[property_meta.type]
+            if lookup is None:
+                return Q(**{f'{column}__icontains': value})
+            if lookup == 'exact':
+                return Q(**{column: value})
+            if lookup == 'startswith':
+                return self.prefix_predicate(column, value)
+            if lookup == 'in':
+                return Q(**{f'{column}__in': split_values(value)})
+
+        elif property_meta.type == 'option':
+            # Option codes and labels are matched in memory
+            option_ids = [
+                option.id for option in match_options(property_meta, value, lookup)]
+            return Q(singleoption_value_id__in=option_ids)
+
+        return None
+
+    def prefix_predicate(self, column, value):
+        """
+        Case-sensitive prefix match that can use a b-tree index.
+
+        SQLite's LIKE is case-insensitive and never uses an ordinary index,
+        so there it becomes the equivalent range on the binary collation.
+        On PostgreSQL, LIKE 'value%' is served by the varchar_pattern_ops
+        index of migration 0008.
+        """
+        if connections[self.queryset.db].vendor == 'sqlite':
+            return Q(**{
+                f'{column}__gte': value,
+                f'{column}__lt': value + PREFIX_UPPER_BOUND,
+            })
+        return Q(**{f'{column}__startswith': value})
+
+    def has_value_predicate(self, property_meta):
+        """Condition on a ContactProperty row holding a value"""
+        if property_meta.type == 'option':
+            return Q(singleoption_value__isnull=False)
+        return Q(**{f'{TEXT_COLUMNS[property_meta.type]}__isnull': False})
 
     def filter_search(self, queryset, name, value):
         """Search across all property values"""
         if not value or value.lower() == 'null':
             return queryset
 
-        search_query = Q()
+        return get_search_backend(queryset.db).filter(queryset, value)
 
-        # Search in all singleline properties
-        search_query |= Q(
-            contactproperty__property__type='singleline',
-            contactproperty__singleline_value__icontains=value
-        )
 
-        # Search in all textarea properties
-        search_query |= Q(
-            contactproperty__property__type='textarea',
-            contactproperty__richtext_value__icontains=value
-        )
+class FlatContactFilter(ContactFilter):
+    """ContactFilter semantics evaluated against the FlatContact read model"""
+
+    class Meta:
+        model = FlatContact
+        fields = ['search']
+
+    def _filter_by_property_slug(self, queryset, param, value):
+        """Filter by any property slug, with an optional operator suffix"""
+        slug, lookup = split_lookup(param)
+        property_meta = property_registry.get(slug)
+        if property_meta is None:
+            return queryset
+
+        if lookup == 'isnull':
+            isnull = parse_bool(value)
+            if isnull is None:
+                return queryset
+            # Missing key or JSON null
+            missing = Q(**{f'values__{slug}__isnull': True}) | Q(**{f'values__{slug}': None})
+            return queryset.filter(missing if isnull else ~missing)
+
+        if property_meta.type in TEXT_COLUMNS:
+            field = f'values__{slug}'
+            if lookup is None:
+                return queryset.filter(**{f'{field}__icontains': value})
+            if lookup == 'exact':
+                return queryset.filter(**{field: value})
+            if lookup == 'startswith':
+                return queryset.filter(self.prefix_predicate(field, value))
+            if lookup == 'in':
+                return queryset.filter(**{f'{field}__in': split_values(value)})
+
+        elif property_meta.type == 'option':
+            option_ids = [
+                str(option.id) for option in match_options(property_meta, value, lookup)]
+            return queryset.filter(**{f'values__{slug}__id__in': option_ids})
+
+        return queryset
+
+
+class ContactQueryMixin:
+    """
+    Filtering and serialization shared by the contact list and export views.
 
-        # Search in all option properties
-        search_query |= Q(
-            contactproperty__property__type='option',
-            contactproperty__singleoption_value__value__icontains=value
+    Both accept any property slug as a filter, ``search`` and ``display``,
+    and read either the EAV tables or the FlatContact read model.
+    """
+    serializer_class = ContactSerializer
+    filter_backends = [DjangoFilterBackend, PropertyOrderingFilter]
+    # Serve from the FlatContact read model; None uses the
+    # CONTACTS_USE_READ_MODEL setting
+    use_read_model = None
+
+    def uses_read_model(self):
+        if self.use_read_model is not None:
+            return self.use_read_model
+        return getattr(settings, 'CONTACTS_USE_READ_MODEL', False)
+
+    @property
+    def filterset_class(self):
+        if self.uses_read_model():
+            return FlatContactFilter
+        return ContactFilter
+
+    def get_serializer_class(self):
+        if self.uses_read_model():
+            return FlatContactSerializer
+        return self.serializer_class
+
+    def get_queryset(self):
+        """
+        Contacts with the property rows the serializer displays.
+
+        Only the columns the serializer reads are loaded, and the prefetch is
+        limited to the properties named in ``display``. Property and option
+        metadata come from the registry, so nothing is joined.
+        """
+        if self.uses_read_model():
+            # One row per contact, no joins or DISTINCT needed
+            return FlatContact.objects.only(
+                'contact_id', 'values', 'created_at', 'updated_at')
+
+        contact_properties = ContactProperty.objects.only(
+            'contact_id', 'property_id', 'singleline_value',
+            'richtext_value', 'singleoption_value'
+        )
+        display_param = self.request.query_params.get('display', '')
+        if display_param.strip():
+            contact_properties = contact_properties.filter(property_id__in=[
+                property_meta.id
+                for property_meta in property_registry.resolve_display(display_param)
+            ])
+        return Contact.objects.only('id', 'created_at', 'updated_at').prefetch_related(
+            Prefetch('contactpropertys', queryset=contact_properties)
         )
 
-        return queryset.filter(search_query).distinct()
+    def get_serializer_context(self):
+        """Add request context to serializer for dynamic field handling"""
+        context = super().get_serializer_context()
+        context['request'] = self.request
+        return context
+
 
+class ContactListMixin(ContactQueryMixin):
+    """Pagination and response caching shared by the sync and async list views"""
+    pagination_class = ContactPagination
+    cursor_pagination_class = ContactCursorPagination
+    # Count strategy for page-number pagination; None uses the
+    # CONTACTS_COUNT_STRATEGY setting
+    count_strategy = None
+    # Seconds to cache list responses; None uses the
+    # CONTACTS_RESPONSE_CACHE_TIMEOUT setting, 0 disables the cache
+    response_cache_timeout = None
+
+    @property
+    def paginator(self):
+        """Use keyset pagination when the request carries a cursor parameter"""
+        if not hasattr(self, '_paginator'):
+            cursor_param = self.cursor_pagination_class.cursor_query_param
+            request = getattr(self, 'request', None)
+            if request is not None and cursor_param in request.query_params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_response_cache_timeout(self):
+        if self.response_cache_timeout is not None:
+            return self.response_cache_timeout
+        return getattr(settings, 'CONTACTS_RESPONSE_CACHE_TIMEOUT', 0)
 
-class ContactPagination(PageNumberPagination):
-    """Custom pagination for contacts"""
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+    def get_response_cache_key(self, request):
+        prefix = 'contacts:response:flat' if self.uses_read_model() else 'contacts:response'
+        return response_cache_key(request, prefix=prefix)
 
 
 @extend_schema_view(
@@ -213,6 +442,24 @@ class ContactPagination(PageNumberPagination):
                 description='Number of items per page (max 100)',
                 examples=[OpenApiExample('20 per page', value=20)]
             ),
+            OpenApiParameter(
+                name='count',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='How the total `count` is computed: exact, estimated, cached or none. '
+                            'The strategy applied is reported as `count_strategy`.',
+                enum=['exact', 'estimated', 'cached', 'none'],
+            ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Opt into keyset pagination ordered by (created_at, id). '
+                            'Pass an empty value for the first page, then follow the '
+                            'opaque next/previous links. No count is returned in this mode, '
+                            'and `ordering` is rejected.',
+                examples=[OpenApiExample('First page', value='')]
+            ),
         ],
         responses={
             200: OpenApiResponse(
@@ -223,6 +470,7 @@ class ContactPagination(PageNumberPagination):
                         'Success Response',
                         value={
                             "count": 1500,
+                            "count_strategy": "exact",
                             "next": "http://127.0.0.1:8000/api/v1/contacts/?page=2",
                             "previous": None,
                             "results": [
@@ -249,6 +497,10 @@ class ContactPagination(PageNumberPagination):
                     )
                 ]
             ),
+            304: OpenApiResponse(
+                description='Contacts unchanged since the ETag or date sent in '
+                            'If-None-Match / If-Modified-Since'
+            ),
             429: OpenApiResponse(
                 description='Rate limit exceeded',
                 examples=[
@@ -268,34 +520,41 @@ class ContactPagination(PageNumberPagination):
         }
     )
 )
-class ContactListAPIView(generics.ListAPIView):
+@method_decorator(
+    condition(etag_func=contact_list_etag, last_modified_func=contact_list_last_modified),
+    name='get'
+)
+class ContactListAPIView(ContactListMixin, generics.ListAPIView):
     """
     Dynamic contact list API that accepts any property slug as filter
     """
-    serializer_class = ContactSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend]
-    filterset_class = ContactFilter
-    pagination_class = ContactPagination
 
-    def get_queryset(self):
-        """Optimized queryset with prefetch for better performance"""
-        return Contact.objects.prefetch_related(
-            Prefetch(
-                'contactpropertys',
-                queryset=ContactProperty.objects.select_related(
-                    'property', 'singleoption_value'
-                )
-            )
-        ).distinct()
+    def list(self, request, *args, **kwargs):
+        """
+        Serve repeated queries from the response cache.
 
-    def get_serializer_context(self):
-        """Add request context to serializer for dynamic field handling"""
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
+        Entries are keyed on the normalized query string and the current
+        data version, so a hit never touches the database. The outcome is
+        reported in the ``X-Cache`` header.
+        """
+        timeout = self.get_response_cache_timeout()
+        if not timeout:
+            return self.list_uncached(request, *args, **kwargs)
 
-    def list(self, request, *args, **kwargs):
+        cache_key = self.get_response_cache_key(request)
+        data = cache.get(cache_key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = self.list_uncached(request, *args, **kwargs)
+        cache.set(cache_key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list_uncached(self, request, *args, **kwargs):
         """Custom list method with enhanced metadata"""
         queryset = self.filter_queryset(self.get_queryset())
 
@@ -0,0 +1,118 @@
+from django.db.models import Prefetch
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse, OpenApiExample
+from drf_spectacular.types import OpenApiTypes
+
+from contacts.bulk import update_contact, validate_row
+from contacts.models import Contact, ContactProperty
+from contacts.serializers.contact import ContactDetailSerializer
+
+CONTACT_DETAIL_EXAMPLE = {
+    'id': '123e4567-e89b-12d3-a456-426614174000',
+    'created_at': '2023-01-15T10:30:00Z',
+    'updated_at': '2023-01-15T10:30:00Z',
+    'properties': [
+        {
+            'property_name': 'Department',
+            'property_slug': 'department',
+            'property_type': 'option',
+            'value': {
+                'code': 'it',
+                'value': 'IT Department',
+                'id': '456e7890-e89b-12d3-a456-426614174001'
+            }
+        },
+        {
+            'property_name': 'Email',
+            'property_slug': 'email',
+            'property_type': 'singleline',
+            'value': 'john.doe@company.com'
+        },
+    ]
+}
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['Contacts'],
+        summary='Retrieve a contact with all its properties',
+        description='''
+        Return one contact and every property it has a value for, in two
+        queries: the contact, then its property rows joined to their
+        property and option.
+        ''',
+        responses={
+            200: OpenApiResponse(
+                response=ContactDetailSerializer,
+                description='The contact',
+                examples=[OpenApiExample('Contact', value=CONTACT_DETAIL_EXAMPLE)]
+            ),
+            404: OpenApiResponse(description='No contact with this id'),
+        }
+    ),
+    patch=extend_schema(
+        tags=['Contacts'],
+        summary='Update property values of a contact',
+        description='''
+        Set property values by slug, in the shape accepted by the bulk
+        endpoint. Only the rows whose value changes are written, in one
+        transaction; a `null` value clears the property.
+        ''',
+        request=OpenApiTypes.OBJECT,
+        examples=[
+            OpenApiExample(
+                'Move to HR',
+                value={'department': 'hr', 'notes': 'Transferred in March'},
+                request_only=True
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                response=ContactDetailSerializer,
+                description='The updated contact'
+            ),
+            400: OpenApiResponse(
+                description='Invalid values',
+                examples=[OpenApiExample(
+                    'Invalid option', value={'department': ['Unknown option code "xx".']})]
+            ),
+            404: OpenApiResponse(description='No contact with this id'),
+        }
+    )
+)
+class ContactDetailAPIView(generics.GenericAPIView):
+    """Read one contact with all its properties, or update some of them"""
+    serializer_class = ContactDetailSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    lookup_url_kwarg = 'contact_id'
+
+    def get_queryset(self):
+        return Contact.objects.prefetch_related(
+            Prefetch(
+                'contactpropertys',
+                queryset=ContactProperty.objects.select_related(
+                    'property', 'singleoption_value'
+                ).order_by('property__name')
+            )
+        )
+
+    def get(self, request, *args, **kwargs):
+        contact = self.get_object()
+        return Response(self.get_serializer(contact).data)
+
+    def patch(self, request, *args, **kwargs):
+        contact = generics.get_object_or_404(
+            Contact.objects.all(), pk=kwargs[self.lookup_url_kwarg])
+        self.check_object_permissions(request, contact)
+
+        if not isinstance(request.data, dict):
+            raise ValidationError({'non_field_errors': ['Expected an object.']})
+        _, values, errors = validate_row(request.data)
+        if errors:
+            raise ValidationError(errors)
+
+        update_contact(contact, values, user=request.user)
+        return Response(self.get_serializer(self.get_object()).data)
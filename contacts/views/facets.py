@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse, OpenApiExample
+from drf_spectacular.types import OpenApiTypes
+
+from contacts.cache import response_cache_key
+from contacts.models import Contact, ContactProperty
+from contacts.registry import property_registry
+from contacts.views.contact import ContactQueryMixin
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['Contacts'],
+        summary='Count contacts per option',
+        description='''
+        For each requested option property, count the contacts matching the
+        filters per option. Accepts the same dynamic property filters and
+        `search` parameter as the contact list; every option is listed, in
+        display order, including those with no contacts.
+
+        All counts come from one GROUP BY query and are cached per filter
+        signature until contact data changes.
+        ''',
+        parameters=[
+            OpenApiParameter(
+                name='facets',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Comma-separated option property slugs (all option properties by default)',
+                examples=[OpenApiExample('Department and status', value='department,status')]
+            ),
+            OpenApiParameter(
+                name='search',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Search across all contact properties',
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description='Counts per option, keyed by property slug',
+                examples=[
+                    OpenApiExample(
+                        'Facets',
+                        value={
+                            'department': [
+                                {'code': 'it', 'value': 'IT Department',
+                                 'id': '456e7890-e89b-12d3-a456-426614174001', 'count': 120},
+                                {'code': 'hr', 'value': 'HR Department',
+                                 'id': '456e7890-e89b-12d3-a456-426614174002', 'count': 0},
+                            ]
+                        }
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description='A requested slug is not an option property'),
+        }
+    )
+)
+class ContactFacetsAPIView(ContactQueryMixin, generics.GenericAPIView):
+    """Contact counts per option of option properties, under the list filters"""
+    permission_classes = [AllowAny]
+    # Order does not change the counts
+    filter_backends = [DjangoFilterBackend]
+    # Facets always group ContactProperty rows
+    use_read_model = False
+    # Seconds to cache facet counts; None uses the
+    # CONTACTS_FACET_CACHE_TIMEOUT setting, 0 disables the cache
+    cache_timeout = None
+
+    def get_queryset(self):
+        return Contact.objects.all()
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'CONTACTS_FACET_CACHE_TIMEOUT', 0)
+
+    def get(self, request, *args, **kwargs):
+        timeout = self.get_cache_timeout()
+        cache_key = response_cache_key(request, prefix='contacts:facets') if timeout else None
+        if cache_key:
+            data = cache.get(cache_key)
+            if data is not None:
+                return Response(data, headers={'X-Cache': 'HIT'})
+
+        data = self.get_facets(self.get_facet_properties())
+        if not cache_key:
+            return Response(data)
+        cache.set(cache_key, data, timeout)
+        return Response(data, headers={'X-Cache': 'MISS'})
+
+    def get_facet_properties(self):
+        """Resolve the ``facets`` parameter to option property metadata"""
+        slugs = [
+            slug.strip() for slug in self.request.query_params.get('facets', '').split(',')
+            if slug.strip()
+        ]
+        if not slugs:
+            return [
+                property_meta for property_meta in property_registry.all()
+                if property_meta.type == 'option'
+            ]
+
+        properties = []
+        errors = {}
+        for slug in slugs:
+            property_meta = property_registry.get(slug)
+            if property_meta is None or property_meta.type != 'option':
+                errors[slug] = ['Not an option property.']
+            else:
+                properties.append(property_meta)
+        if errors:
+            raise ValidationError({'facets': errors})
+        return properties
+
+    def get_facets(self, properties):
+        """Count contacts per option of ``properties`` in one GROUP BY"""
+        if not properties:
+            return {}
+
+        rows = ContactProperty.objects.filter(
+            property_id__in=[property_meta.id for property_meta in properties],
+            singleoption_value__isnull=False
+        )
+        contacts = self.filter_queryset(self.get_queryset())
+        if contacts.query.has_filters():
+            rows = rows.filter(contact_id__in=contacts.values('pk'))
+
+        counts = {
+            (row['property_id'], row['singleoption_value_id']): row['count']
+            for row in rows.values(
+                'property_id', 'singleoption_value_id'
+            ).annotate(count=Count('pk')).order_by()
+        }
+        return {
+            property_meta.slug: [
+                dict(option.as_dict(), count=counts.get((property_meta.id, option.id), 0))
+                for option in property_meta.options
+            ]
+            for property_meta in properties
+        }